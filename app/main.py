@@ -11,6 +11,12 @@ from app.queries.routes import router as queries_router
 from app.results.routes import router as results_router
 from app.users.models import User
 
+# Uvicorn only configures its own loggers; give app and pipeline loggers a handler
+logging.basicConfig(
+    level=logging.INFO,
+    format="[%(asctime)s] %(levelname)s %(name)s: %(message)s",
+    datefmt="%H:%M:%S",
+)
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
@@ -6,11 +6,30 @@ import os
 import logging
 import asyncio
 import re
+import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Disease-extraction patterns, compiled once at import
+_DISEASE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r"treat\s+(.*?)(?:\?|$)",
+    r"for\s+(.*?)(?:\?|$)",
+    r"repurposing\s+.*?\s+for\s+(.*?)(?:\?|$)",
+    r"against\s+(.*?)(?:\?|$)",
+)]
+_TRAIL_RE = re.compile(r"\s+(using|with|by).*$")
+
+# Finished reports keyed by normalized disease: {disease: (expires_at, report_text)}
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "64"))
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "86400"))
+_report_cache: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+# Prefixes run_agent_local uses for timeout / failure placeholder text
+_FAILED_REPORT_PREFIXES = ("⚠️", "❌")
+
 class AgentExecutionError(Exception):
     """Custom exception for agent execution failures."""
     pass
@@ -31,25 +50,50 @@ def get_pharma_agents_path():
     pharma_agents_path = project_root / "pharma_agents"
     return pharma_agents_path
 
+# Resolve and import the orchestrator once at module load rather than per request
+get_pharma_agents_path()
+try:
+    from pharma_agents.async_orchestrator import run_pipeline
+    _pipeline_import_error = None
+except ImportError as e:
+    run_pipeline = None
+    _pipeline_import_error = e
+
+def _normalize_disease(disease: str) -> str:
+    """Cache key for a disease name: lowercased, whitespace collapsed."""
+    return " ".join(disease.lower().split())
+
+def get_cached_report(disease: str) -> Optional[str]:
+    """Return a cached report for this disease if one is still fresh."""
+    key = _normalize_disease(disease)
+    entry = _report_cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= time.monotonic():
+        del _report_cache[key]
+        return None
+    _report_cache.move_to_end(key)
+    return entry[1]
+
+def cache_report(disease: str, report_text: str) -> None:
+    """Store a finished report, evicting the least recently used entry when full."""
+    key = _normalize_disease(disease)
+    _report_cache[key] = (time.monotonic() + REPORT_CACHE_TTL, report_text)
+    _report_cache.move_to_end(key)
+    while len(_report_cache) > REPORT_CACHE_SIZE:
+        _report_cache.popitem(last=False)
+
 def extract_disease_from_query(query: str) -> str:
     """
     Extract the disease name from a natural language query.
     Simple heuristic approach.
     """
-    # Common patterns
-    patterns = [
-        r"treat\s+(.*?)(?:\?|$)",
-        r"for\s+(.*?)(?:\?|$)",
-        r"repurposing\s+.*?\s+for\s+(.*?)(?:\?|$)",
-        r"against\s+(.*?)(?:\?|$)"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, query, re.IGNORECASE)
+    for pattern in _DISEASE_PATTERNS:
+        match = pattern.search(query)
         if match:
             candidate = match.group(1).strip()
             # Remove common trailing words if captured
-            candidate = re.sub(r"\s+(using|with|by).*$", "", candidate)
+            candidate = _TRAIL_RE.sub("", candidate)
             if len(candidate) > 2:
                 return candidate
                 
@@ -75,33 +119,40 @@ async def run_pharma_research(query: str, user_id: int) -> tuple[str, str]:
     """
     logger.info(f"Starting pharma research for user {user_id}: {query[:100]}...")
     
+    if run_pipeline is None:
+        logger.error(f"Failed to import pharma_agents module: {_pipeline_import_error}")
+        raise AgentExecutionError(
+            f"Agent module not found. Please ensure the pharma_agents package is properly installed. Error: {_pipeline_import_error}"
+        )
+    
     try:
-        # Ensure pharma_agents module is in path
-        get_pharma_agents_path()
-        
-        # Import orchestrator
-        # Note: We import here to avoid top-level import errors if path isn't set
-        from pharma_agents.async_orchestrator import run_pipeline
-        
         # Extract disease from query
         disease = extract_disease_from_query(query)
         logger.info(f"Extracted disease target: {disease}")
         
+        cached_report = get_cached_report(disease)
+        if cached_report is not None:
+            logger.info(f"Serving cached report for: {disease}")
+            return generate_title_from_query(query), cached_report
+        
         # Run the pipeline
         # Phase 1 -> Phase 2 -> Phase 3 are handled inside run_pipeline
         context = await run_pipeline(disease=disease)
         
         # Check for errors
         if context.errors:
-            logger.warning(f"Some agents encountered errors: {context.errors}")
+            logger.warning(f"Some agents encountered errors: {context.errors_text}")
             
         # Extract report
         report_text = context.report
         if not report_text:
             if context.errors:
-                raise AgentExecutionError(f"Report generation failed. Errors: {context.errors}")
+                raise AgentExecutionError(f"Report generation failed. Errors: {context.errors_text}")
             else:
                 report_text = "Analysis completed but no report was generated. Please check the individual agent outputs."
+        elif not context.errors and not report_text.lstrip().startswith(_FAILED_REPORT_PREFIXES):
+            # Only cache clean runs; a timed-out or failed report should be retried
+            cache_report(disease, report_text)
         
         # Generate title
         title = generate_title_from_query(query)
@@ -110,11 +161,6 @@ async def run_pharma_research(query: str, user_id: int) -> tuple[str, str]:
         
         return title, report_text
         
-    except ImportError as e:
-        logger.error(f"Failed to import pharma_agents module: {e}")
-        raise AgentExecutionError(
-            f"Agent module not found. Please ensure the pharma_agents package is properly installed. Error: {e}"
-        )
     except Exception as e:
         logger.error(f"Agent execution failed: {e}", exc_info=True)
         raise AgentExecutionError(f"Failed to execute research agents: {str(e)}")
@@ -1,26 +1,42 @@
 import asyncio
-from typing import Optional, Dict, Any
-from datetime import datetime
+import logging
+import os
+from typing import Optional, Dict, Any, List
 import traceback
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+import statistics
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 import json
-from pydantic import BaseModel
+from dataclasses import dataclass, field
 from agents import Runner
 
 # Import agents
 from .web_intelligence_research_agent import web_intelligence_agent
 from .patent_research_agent import patent_research_agent
-from .clinical_trails_research_agent import clinical_trails_research_agent
+from .clinical_trails_research_agent import get_clinical_trials_agent
 from .market_insights_agent import market_insights_agent
 from .exim_trade_agent import exim_trade_agent
 from .report_generation_agent import report_generation_agent
 # from .repurposing_interpretation_agent import repurposing_interpretation_agent
 
+from .llm_cache import get_cached_output, store_output, cache_stats
+from .tools.json_utils import dumps
+from .tools.tool_budget import start_tool_budget
+
 # Import unified pipeline tool directly (logic function, not the tool wrapper)
 from .tools.unified_repurposing_pipeline import run_repurposing_pipeline_logic
 
+# Wall-clock timestamps come from the logging formatter, not per message
+logger = logging.getLogger(__name__)
+
 
-# Results container
-class PharmaResearchContext(BaseModel):
+# Results container (plain slotted dataclass: fields are only set internally, nothing to validate)
+@dataclass(slots=True)
+class PharmaResearchContext:
     # New pipeline data
     unified_pipeline_data: Optional[Dict[str, Any]] = None
     # interpretation: Optional[str] = None
@@ -34,113 +50,136 @@ class PharmaResearchContext(BaseModel):
     
     # Final output
     report: Optional[str] = None
-    errors: Optional[str] = None
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def errors_text(self) -> str:
+        """All collected error traces as one block."""
+        return "\n\n".join(self.errors)
+
+
+# Wall-clock budget per agent run; a hung agent records a timeout instead of stalling its phase
+AGENT_TIMEOUT_S = float(os.getenv("AGENT_TIMEOUT_S", "120"))
+REPORT_TIMEOUT_S = float(os.getenv("REPORT_TIMEOUT_S", "300"))
+
+# Report generation starts once this many context agents have finished,
+# plus a grace period for the rest
+MIN_CONTEXT_SECTIONS = int(os.getenv("MIN_CONTEXT_SECTIONS", "3"))
+CONTEXT_GRACE_S = float(os.getenv("CONTEXT_GRACE_S", "30"))
+
+# Caps concurrent LLM agent runs within one pipeline run so a throttled provider
+# isn't hit by every agent at once. run_pipeline opens a fresh semaphore per run,
+# so concurrent requests don't queue behind each other; unset means no cap.
+AGENT_CONCURRENCY = int(os.getenv("AGENT_CONCURRENCY", "5"))
+_agent_semaphore: ContextVar[Optional[asyncio.Semaphore]] = ContextVar("agent_semaphore", default=None)
+
+# Small dedicated pool for blocking work; the default executor is sized for CPU-bound jobs
+AGENT_THREADS = int(os.getenv("AGENT_THREADS", "6"))
+_EXECUTOR = ThreadPoolExecutor(max_workers=AGENT_THREADS, thread_name_prefix="agent")
+
+# Search tool calls (Serper-backed) allowed per agent run
+TOOL_CALL_BUDGET = int(os.getenv("TOOL_CALL_BUDGET", "6"))
+
+# Turn budget per agent adapts to the turns its recent successful runs needed
+MAX_TURNS = 7
+MIN_TURNS = 3
+_TURN_STATS: Dict[str, deque] = defaultdict(lambda: deque(maxlen=50))
+
 
+def _max_turns_for(agent) -> int:
+    """Median turns of recent successful runs plus headroom, clamped to [MIN_TURNS, MAX_TURNS]."""
+    history = _TURN_STATS.get(agent.name)
+    if not history:
+        return MAX_TURNS
+    return max(MIN_TURNS, min(MAX_TURNS, int(statistics.median(history)) + 2))
 
-# Runner for a single agent (async compatible using executor)
-async def run_agent_local(agent, prompt: str, assign_field: str, context: PharmaResearchContext):
+# Log lines carry time since the current phase began rather than wall-clock stamps
+_phase_start: ContextVar[Optional[float]] = ContextVar("phase_start", default=None)
+
+
+def _start_phase() -> None:
+    _phase_start.set(time.monotonic())
+
+
+def _elapsed() -> str:
+    t0 = _phase_start.get()
+    return f"+{time.monotonic() - t0:5.1f}s " if t0 is not None else ""
+
+
+# Runner for a single agent
+async def run_agent_local(agent, prompt: str, assign_field: str, context: PharmaResearchContext, timeout: float = AGENT_TIMEOUT_S):
     """Run any agent locally using Runner, assign response to container."""
     try:
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] → {assign_field} started")
+        cached = get_cached_output(agent, prompt)
+        if cached is not None:
+            logger.info(f"{_elapsed()}✓ {assign_field} loaded from cache")
+            setattr(context, assign_field, cached)
+            return
         
-        # Run the agent using Runner.run() - this should be synchronous
-        def run_sync():
-            import inspect
-            # result = Runner.run(agent, input=prompt, max_turns=12)
-            result = asyncio.run(Runner.run(agent, input=prompt, max_turns=7))
+        async with _agent_semaphore.get() or nullcontext():
+            logger.info(f"{_elapsed()}→ {assign_field} started")
             
-            # The result is a RunResult object
-            # We need to extract the actual text content, not the string representation
-            if hasattr(result, 'final_output'):
-                output = result.final_output
-                # Check if output is a coroutine and run it if needed
-                if inspect.iscoroutine(output):
-                    # Create a new event loop to run the coroutine
-                    new_loop = asyncio.new_event_loop()
-                    try:
-                        output = new_loop.run_until_complete(output)
-                    finally:
-                        new_loop.close()
-                # Return the output directly if it's already a string
-                if isinstance(output, str):
-                    return output
-                return str(output) if output is not None else ""
-            elif hasattr(result, 'messages') and result.messages:
-                last_msg = result.messages[-1]
-                content = last_msg.content if hasattr(last_msg, 'content') else str(last_msg)
-                # Check if content is a coroutine and run it if needed
-                if inspect.iscoroutine(content):
-                    new_loop = asyncio.new_event_loop()
-                    try:
-                        content = new_loop.run_until_complete(content)
-                    finally:
-                        new_loop.close()
-                if isinstance(content, str):
-                    return content
-                return str(content) if content is not None else ""
-            else:
-                # Check if result itself is a coroutine
-                if inspect.iscoroutine(result):
-                    new_loop = asyncio.new_event_loop()
-                    try:
-                        result = new_loop.run_until_complete(result)
-                    finally:
-                        new_loop.close()
-                # If we still have a RunResult object, try to extract final_output
-                if hasattr(result, 'final_output'):
-                    output = result.final_output
-                    if isinstance(output, str):
-                        return output
-                    return str(output) if output is not None else ""
-                # Last resort: convert to string
-                return str(result)
+            # Runner.run is a coroutine; awaiting it here lets the phase task group
+            # interleave agents on this loop instead of one loop per worker thread.
+            # The timeout starts once a concurrency slot is held.
+            start_tool_budget(TOOL_CALL_BUDGET)
+            async with asyncio.timeout(timeout):
+                result = await Runner.run(agent, input=prompt, max_turns=_max_turns_for(agent))
         
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, run_sync)
+        # One model response per turn
+        _TURN_STATS[agent.name].append(len(result.raw_responses))
+        output = result.final_output
+        response = output if isinstance(output, str) else str(output or "")
+        store_output(agent, prompt, response)
 
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] ✓ {assign_field} completed\n")
+        logger.info(f"{_elapsed()}✓ {assign_field} completed")
         setattr(context, assign_field, response)
 
+    except TimeoutError:
+        logger.warning(f"{_elapsed()}✗ {assign_field} timed out after {timeout:.0f}s")
+        setattr(context, assign_field, f"⚠️ Agent timed out after {timeout:.0f} seconds.")
+        context.errors.append(f"{assign_field} timed out after {timeout:.0f}s")
+
     except Exception as e:
         error_msg = str(e)
         
         # Special handling for MaxTurnsExceeded - this is often due to tool issues
         if "Max turns" in error_msg or "MaxTurnsExceeded" in str(type(e)):
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] ✗ {assign_field} exceeded max turns (agent got stuck in a loop)\n")
+            logger.warning(f"{_elapsed()}✗ {assign_field} exceeded max turns (agent got stuck in a loop)")
             setattr(context, assign_field, f"⚠️ Agent exceeded maximum conversation turns. This usually indicates a tool error or the task was too complex. Please check the agent's tool implementations.")
         else:
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] ✗ {assign_field} crashed: {error_msg}\n")
+            logger.warning(f"{_elapsed()}✗ {assign_field} crashed: {error_msg}")
             setattr(context, assign_field, f"❌ Agent failed: {error_msg}")
         
-        error_trace = str(traceback.format_exc())
-        context.errors = error_trace if not context.errors else f"{context.errors}\n\n{error_trace}"
+        context.errors.append(traceback.format_exc())
 
 
 # Phase 1: Run Unified Pipeline (Deterministic)
 async def run_unified_pipeline(query: str, context: PharmaResearchContext):
     """Run the deterministic unified pipeline tool directly."""
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] → unified_pipeline started")
+    logger.info(f"{_elapsed()}→ unified_pipeline started")
     try:
         # Call the tool function directly (it's a python function)
         # Note: run_repurposing_pipeline_logic is the undecorated function
         
         # We need to run this in a thread pool to avoid blocking the async loop
-        # since it makes synchronous HTTP requests
+        # since it makes synchronous HTTP requests. The agents' blocking tools
+        # likewise await asyncio.to_thread, so nothing HTTP-bound runs on the loop.
         loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, run_repurposing_pipeline_logic, query)
+        result = await loop.run_in_executor(_EXECUTOR, run_repurposing_pipeline_logic, query)
         
         context.unified_pipeline_data = result
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] ✓ unified_pipeline completed")
+        logger.info(f"{_elapsed()}✓ unified_pipeline completed")
         
     except Exception as e:
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] ✗ unified_pipeline failed: {e}")
-        context.errors = str(e) if not context.errors else f"{context.errors}\n\n{str(e)}"
+        logger.warning(f"{_elapsed()}✗ unified_pipeline failed: {e}")
+        context.errors.append(str(e))
 
 
 # Phase 2: Run Interpretation & Context Agents
 async def run_analysis_and_context(query: str, context: PharmaResearchContext):
     """Run interpretation agent and other context agents in parallel."""
-    print("\n🧬 Phase 2: Running interpretation and context agents...\n")
+    logger.info("🧬 Phase 2: Running interpretation and context agents...")
     
     tasks = []
     
@@ -172,49 +211,127 @@ async def run_analysis_and_context(query: str, context: PharmaResearchContext):
     tasks.extend([
         run_agent_local(web_intelligence_agent, query, "web_intelligence", context),
         run_agent_local(patent_research_agent, query, "patents", context),
-        run_agent_local(clinical_trails_research_agent, query, "clinical_trials", context),
+        run_agent_local(get_clinical_trials_agent(), query, "clinical_trials", context),
         run_agent_local(market_insights_agent, query, "market", context),
         run_agent_local(exim_trade_agent, query, "exim", context)
     ])
     
-    await asyncio.gather(*tasks)
+    # run_agent_local records its own failures/timeouts, so one agent never cancels the rest.
+    # Once MIN_CONTEXT_SECTIONS agents are done, stragglers get CONTEXT_GRACE_S more
+    # before they are cancelled and the report goes ahead without them.
+    running = [asyncio.create_task(task) for task in tasks]
+    pending = set(running)
+    loop = asyncio.get_running_loop()
+    grace_deadline = None
+    while pending:
+        wait_timeout = None if grace_deadline is None else max(0.0, grace_deadline - loop.time())
+        done, pending = await asyncio.wait(pending, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            break
+        if grace_deadline is None and len(running) - len(pending) >= MIN_CONTEXT_SECTIONS:
+            grace_deadline = loop.time() + CONTEXT_GRACE_S
+    
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        missing = [field for _, field in REPORT_CONTEXT_SECTIONS if getattr(context, field) is None]
+        logger.warning(f"{_elapsed()}⏭ continuing without: {', '.join(missing)}")
+        context.errors.append(f"Report started without: {', '.join(missing)}")
 
 
 # Phase 3: Generate final report
-async def generate_final_report(disease: str, context: PharmaResearchContext):
-    """Generate final report using all collected data."""
-    print("\n📘 Phase 3: Generating final report...\n")
-    
-    prompt_block = f"""
-        Synthesize the following global pharmaceutical research findings into a polished academic report for {disease}:
 
-        # SCIENTIFIC & MECHANISTIC VALIDATION (Core Evidence)(Ensure you dont remove anything and give the full input in the final report)
-        {context.unified_pipeline_data}
-        
+# (heading, context field) for each agent section of the report prompt, in order
+REPORT_CONTEXT_SECTIONS = (
+    ("Web Intelligence Findings", "web_intelligence"),
+    ("Patent Prior-Art Insights", "patents"),
+    ("Global Clinical Trial Intelligence", "clinical_trials"),
+    ("Market, Regulatory Approvals, Pricing, Competitors", "market"),
+    ("Export-Import Global Trade Dependency Summary", "exim"),
+)
 
-        # GLOBAL CONTEXT
-        
-        Web Intelligence Findings:
-        {context.web_intelligence}
+REPORT_INSTRUCTIONS = (
+    "Do NOT speculate. If data was missing, summarize the gap briefly.\n"
+    "Generate a visually structured report with narrative clarity and concise tables.\n"
+    "Ensure the \"Repurposing Practical Score\" from the interpretation is highlighted.\n"
+)
 
-        Patent Prior-Art Insights:
-        {context.patents}
 
-        Global Clinical Trial Intelligence:
-        {context.clinical_trials}
+# Upper bound on tokens spent on raw pipeline data in the report prompt
+PIPELINE_TOKEN_BUDGET = int(os.getenv("PIPELINE_TOKEN_BUDGET", "25000"))
 
-        Market, Regulatory Approvals, Pricing, Competitors:
-        {context.market}
 
-        Export-Import Global Trade Dependency Summary:
-        {context.exim}
+@cache
+def _encoding():
+    """gpt-4o-mini tokenizer, loaded on first use (tiktoken may download its BPE file).
+
+    tiktoken is optional and not in requirements.txt; without it, or offline,
+    token counts fall back to a ~4 chars/token estimate.
+    """
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception:
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text) // 4
+
+
+def prune_pipeline_data(data: Optional[Dict[str, Any]], max_tokens: int = PIPELINE_TOKEN_BUDGET) -> Optional[Dict[str, Any]]:
+    """
+    Drop the largest list/dict branches of the pipeline output until it fits the budget.
 
-        Do NOT speculate. If data was missing, summarize the gap briefly.
-        Generate a visually structured report with narrative clarity and concise tables.
-        Ensure the "Repurposing Practical Score" from the interpretation is highlighted.
+    Whole branches are replaced with a short note, so what remains is still
+    well-formed data rather than a string cut off mid-structure.
     """
+    if not data:
+        return data
+    pruned = dict(data)
+    while _count_tokens(dumps(pruned)) > max_tokens:
+        branches = {k: len(dumps(v)) for k, v in pruned.items() if isinstance(v, (list, dict)) and v}
+        if not branches:
+            break
+        largest = max(branches, key=branches.get)
+        logger.info(f"[Report] Omitting pipeline field '{largest}' to fit the {max_tokens}-token budget")
+        pruned[largest] = f"(omitted: {len(pruned[largest])} entries exceeded the prompt budget)"
+    return pruned
 
-    await run_agent_local(report_generation_agent, prompt_block, "report", context)
+
+def _pipeline_json(data: Optional[Dict[str, Any]]) -> str:
+    """Pipeline data as indented JSON (not a Python repr), pruned to the token budget."""
+    if not data:
+        return "(not available)"
+    return dumps(prune_pipeline_data(data), indent=True)
+
+
+def build_report_prompt(disease: str, context: PharmaResearchContext) -> str:
+    """Assemble the report prompt with a single join over all sections."""
+    parts = [
+        f"Synthesize the following global pharmaceutical research findings into a polished academic report for {disease}:\n\n",
+        "# SCIENTIFIC & MECHANISTIC VALIDATION (Core Evidence)(Ensure you dont remove anything and give the full input in the final report)\n",
+        _pipeline_json(context.unified_pipeline_data),
+        "\n\n# GLOBAL CONTEXT\n\n",
+    ]
+    for heading, attr in REPORT_CONTEXT_SECTIONS:
+        parts.extend((heading, ":\n", getattr(context, attr) or "(not available)", "\n\n"))
+    parts.append(REPORT_INSTRUCTIONS)
+    return "".join(parts)
+
+
+async def generate_final_report(disease: str, context: PharmaResearchContext):
+    """Generate final report using all collected data."""
+    logger.info("📘 Phase 3: Generating final report...")
+    _start_phase()
+    
+    prompt_block = build_report_prompt(disease, context)
+
+    await run_agent_local(report_generation_agent, prompt_block, "report", context, timeout=REPORT_TIMEOUT_S)
 
 
 # Main pipeline
@@ -230,31 +347,32 @@ async def run_pipeline(disease: str, drug: Optional[str]=None) -> PharmaResearch
         query = disease  # Pipeline B input
         report_subject = disease
         
-    print("\n🚀 Starting Pharmaceutical Research Pipeline")
-    print(f"Query: {query}")
-    print(f"Target Disease: {disease}")
-    print("="*80 + "\n")
+    logger.info(f"🚀 Starting Pharmaceutical Research Pipeline (query: {query}, target disease: {disease})")
     
-    start = datetime.now()
+    start = time.monotonic()
+    _start_phase()
+    _agent_semaphore.set(asyncio.Semaphore(AGENT_CONCURRENCY))
 
-    # Phase 1: Run Unified Pipeline (Deterministic Data Collection)
-    await run_unified_pipeline(query, context)
-    
-    # Phase 2: Run Interpretation & Context Agents (Parallel)
+    # Phase 1 + 2: the unified pipeline (deterministic data collection) and the
+    # context agents don't depend on each other, so they run side by side.
     # We pass the full query string to context agents
     context_query = f"Gather global intelligence for repurposing {drug} to treat {disease}" if drug else f"Gather global intelligence for drug repurposing options to treat {disease}"
-    await run_analysis_and_context(context_query, context)
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(run_unified_pipeline(query, context))
+        tg.create_task(run_analysis_and_context(context_query, context))
 
     # Phase 3: Generate Report
     await generate_final_report(report_subject, context)
 
-    end = datetime.now()
-    duration = (end - start).total_seconds()
-    print(f"\n✅ Research completed in {duration:.2f} seconds")
+    duration = time.monotonic() - start
+    logger.info(f"✅ Research completed in {duration:.2f} seconds")
+    stats = cache_stats()
+    logger.info(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses")
     
     return context
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s", datefmt="%H:%M:%S")
     disease_name = "Type 2 Diabetes"
     asyncio.run(run_pipeline(disease_name))
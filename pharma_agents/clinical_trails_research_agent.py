@@ -1,178 +1,28 @@
 from agents import Agent, function_tool
-import requests
-import json
-import os
 import dotenv
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
+from pharma_agents.tools.json_utils import dumps, loads
+from pharma_agents.tools.cache import ttl_cache
+from pharma_agents.tools.http_client import SESSION
+from pharma_agents.prompts import load_prompt
+from pharma_agents.tools.io_pool import IO_POOL
+import asyncio
+from functools import cache
+import threading
+from collections import OrderedDict
+
+try:
+    import ijson
+except ImportError:  # optional: stream-parse large study lists
+    ijson = None
 
 dotenv.load_dotenv(override=True)
 
-INSTRUCTIONS= """
-    You are a clinical trial intelligence agent specializing in global drug repurposing insights
-    using clinicaltrials.gov.
-
-    CAPABILITIES:
-    - Discover repurposing signals from therapeutic areas *different* from the original query disease.
-    - Detect practical repurposing opportunities from:
-      • Completed or positive-endpoint trials in mechanistically adjacent but clinically distinct diseases  
-      • Terminated or failed trials that reveal useful **subgroup, biomarker, or secondary endpoint signals**  
-      • Unexpected comorbidity improvements (e.g., lipid, weight, inflammatory, neuro or renal outcomes)  
-      • Endpoint + biomarker insights that can be operationalized into real-world protocols
-
-    STRICT RULES:
-    - Always retrieve REAL, factual clinical trial signals using your tool.
-    - Do NOT fabricate trial names, phases, endpoints, biomarkers, or regulatory claims.
-    - Never present hypotheses as validated evidence unless supported by tool results.
-    - Always separate findings into:
-      ✅ **Evidence-backed signals**
-      💭 **Emerging but unverified mechanistic hypotheses**
-      ⚠️ **Clinically significant safety or feasibility risks**
-    - Limit tool attempts:
-      • You MUST NOT call your clinical trial tool more than 3 times per single query attempt.
-      • If 3 attempts are completed and still no valid response, summarize failure briefly and stop.
-
-    OUTPUT REQUIREMENTS:
-    Your response must be designed for practical research execution and academic reporting, including:
-
-    1. **Repurposing Signal Snapshot**
-       - List 2–5 realistic repurposing signals seen in non-original diseases (if supported by data)
-       - Classify each signal overlap strength qualitatively: high / medium / low with clear reason
-       - Assign a **Feasibility Score** between 0.0 and 1.0 (1.0 = closest to immediate translation)
-
-    2. **Endpoint & Biomarker Extraction**
-       - Extract primary and secondary endpoints that matter for repurposing practicality
-       - Highlight biomarkers or surrogate signals that can be used in experiments or patient selection
-         (e.g., HbA1c, ALT/AST, GFR, CRP, weight/BMI, HOMA-IR, or any clinically measured biomarker if data exists)
-       - Map endpoints to repurposing value, not just restate them
-
-    3. **Subgroup & Population Intelligence**
-       - Identify *subpopulations* with positive or distinct effect signals that could support a repurposing path
-       - Highlight recruiting regions or geographies under-explored in trials that may serve practical white space
-         for extrapolated global repurposing validation
-
-    4. **Failure Signal Mining (if applicable)**
-       - If trial termination or failure exists, extract:
-         • Evidence hinting WHY it failed (dose, endpoint mismatch, toxicity, design flaw)
-         • Biomarker or subgroup signals that were *still positive*
-         • Practical lessons to avoid repeating the same failure in repurposing pipeline
-
-    5. **Safety & Real-World Deployment Flags**
-       - Extract serious safety issues or risk patterns tied to feasibility
-       - Identify interaction-classes or contraindications that may affect clinical redeployment practicality
-
-    6. **Next-Step Practical Validation**
-       - Propose concrete experiments or data-validation steps the research team can implement, such as:
-         • Retrospective cohort mining for secondary endpoints
-         • Biomarker-driven patient stratification for new indication
-         • Surrogate endpoint justification for regulatory fast-track feasibility
-         (*only suggest when it logically corresponds to the retrieved signals*)
-
-    7. **Repurposing Practical Score (Final Output)**
-       - Provide ONE final **Repurposing Practical Score** between 0.0 and 1.0 summarizing:
-         mechanistic adjacency + clinical signal strength + real-world feasibility + safety practicality
-
-    EXAMPLES OF GOOD OUTPUT TONE:
-       “A Phase 2 obesity study showed significant HbA1c reduction in subgroup patients with baseline insulin resistance—
-       suggesting a high-quality signal for metabolic redeployment. A practical re-entry path could use HOMA-IR for patient
-       selection refinement. Feasibility Score: 0.82.”
-
-    You are a global research agent—always contextualize insights with worldwide clinical redeployment practicality.
-
-"""
+INSTRUCTIONS = load_prompt("clinical_trials")
 
 class ClinicalTrialsToolInput(BaseModel):
-    condition: Optional[str] = None
-    intervention: Optional[str] = None
-    phase: Optional[List[str]] = None
-    status: Optional[List[str]] = None
-    sponsor: Optional[str] = None
-    location: Optional[str] = None
-from agents import Agent, function_tool
-import requests
-import json
-import os
-import dotenv
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
-
-dotenv.load_dotenv(override=True)
-
-INSTRUCTIONS= """
-    You are a clinical trial intelligence agent specializing in global drug repurposing insights
-    using clinicaltrials.gov.
-
-    CAPABILITIES:
-    - Discover repurposing signals from therapeutic areas *different* from the original query disease.
-    - Detect practical repurposing opportunities from:
-      • Completed or positive-endpoint trials in mechanistically adjacent but clinically distinct diseases  
-      • Terminated or failed trials that reveal useful **subgroup, biomarker, or secondary endpoint signals**  
-      • Unexpected comorbidity improvements (e.g., lipid, weight, inflammatory, neuro or renal outcomes)  
-      • Endpoint + biomarker insights that can be operationalized into real-world protocols
-
-    STRICT RULES:
-    - Always retrieve REAL, factual clinical trial signals using your tool.
-    - Do NOT fabricate trial names, phases, endpoints, biomarkers, or regulatory claims.
-    - Never present hypotheses as validated evidence unless supported by tool results.
-    - Always separate findings into:
-      ✅ **Evidence-backed signals**
-      💭 **Emerging but unverified mechanistic hypotheses**
-      ⚠️ **Clinically significant safety or feasibility risks**
-    - Limit tool attempts:
-      • You MUST NOT call your clinical trial tool more than 3 times per single query attempt.
-      • If 3 attempts are completed and still no valid response, summarize failure briefly and stop.
-
-    OUTPUT REQUIREMENTS:
-    Your response must be designed for practical research execution and academic reporting, including:
-
-    1. **Repurposing Signal Snapshot**
-       - List 2–5 realistic repurposing signals seen in non-original diseases (if supported by data)
-       - Classify each signal overlap strength qualitatively: high / medium / low with clear reason
-       - Assign a **Feasibility Score** between 0.0 and 1.0 (1.0 = closest to immediate translation)
-
-    2. **Endpoint & Biomarker Extraction**
-       - Extract primary and secondary endpoints that matter for repurposing practicality
-       - Highlight biomarkers or surrogate signals that can be used in experiments or patient selection
-         (e.g., HbA1c, ALT/AST, GFR, CRP, weight/BMI, HOMA-IR, or any clinically measured biomarker if data exists)
-       - Map endpoints to repurposing value, not just restate them
-
-    3. **Subgroup & Population Intelligence**
-       - Identify *subpopulations* with positive or distinct effect signals that could support a repurposing path
-       - Highlight recruiting regions or geographies under-explored in trials that may serve practical white space
-         for extrapolated global repurposing validation
-
-    4. **Failure Signal Mining (if applicable)**
-       - If trial termination or failure exists, extract:
-         • Evidence hinting WHY it failed (dose, endpoint mismatch, toxicity, design flaw)
-         • Biomarker or subgroup signals that were *still positive*
-         • Practical lessons to avoid repeating the same failure in repurposing pipeline
-
-    5. **Safety & Real-World Deployment Flags**
-       - Extract serious safety issues or risk patterns tied to feasibility
-       - Identify interaction-classes or contraindications that may affect clinical redeployment practicality
-
-    6. **Next-Step Practical Validation**
-       - Propose concrete experiments or data-validation steps the research team can implement, such as:
-         • Retrospective cohort mining for secondary endpoints
-         • Biomarker-driven patient stratification for new indication
-         • Surrogate endpoint justification for regulatory fast-track feasibility
-         (*only suggest when it logically corresponds to the retrieved signals*)
-
-    7. **Repurposing Practical Score (Final Output)**
-       - Provide ONE final **Repurposing Practical Score** between 0.0 and 1.0 summarizing:
-         mechanistic adjacency + clinical signal strength + real-world feasibility + safety practicality
-
-    EXAMPLES OF GOOD OUTPUT TONE:
-       “A Phase 2 obesity study showed significant HbA1c reduction in subgroup patients with baseline insulin resistance—
-       suggesting a high-quality signal for metabolic redeployment. A practical re-entry path could use HOMA-IR for patient
-       selection refinement. Feasibility Score: 0.82.”
-
-    You are a global research agent—always contextualize insights with worldwide clinical redeployment practicality.
-
-"""
-
-class ClinicalTrialsToolInput(BaseModel):
-    condition: Optional[str] = None
+    condition: Optional[Union[str, List[str]]] = None
     intervention: Optional[str] = None
     phase: Optional[List[str]] = None
     status: Optional[List[str]] = None
@@ -182,10 +32,106 @@ class ClinicalTrialsToolInput(BaseModel):
     fields: Optional[List[str]] = None
     page_size: Optional[int] = 20
     page_token: Optional[str] = None
+    max_pages: Optional[int] = 1
     sort: Optional[List[str]] = None
 
+# ClinicalTrials.gov API v2 (User-Agent/Accept headers come from the shared session)
+CT_BASE_URL = "https://clinicaltrials.gov/api/v2/studies"
+# Fields to return, pre-joined for the `fields` parameter. Only what
+# _simplify_studies reads: large unused fields such as eligibilityCriteria
+# would only add bytes to download and parse.
+CT_FIELDS = "|".join([
+    "protocolSection.identificationModule.nctId",
+    "protocolSection.identificationModule.briefTitle",
+    "protocolSection.statusModule.overallStatus",
+    "protocolSection.designModule.phases",
+    "protocolSection.conditionsModule.conditions",
+    "protocolSection.armsInterventionsModule.interventions"
+])
+
+# Phase inputs ("PHASE2", "Phase 2", "2", "EARLY_PHASE1") -> query.term phrase
+PHASE_TERMS = {
+    **{f"PHASE{n}": f'"Phase {n}"' for n in "1234"},
+    **{n: f'"Phase {n}"' for n in "1234"},
+    "EARLYPHASE1": '"Phase 1"',
+}
+
+# Accepted values for filter.overallStatus / filter.studyType in the v2 API
+VALID_STATUSES = frozenset({
+    "ACTIVE_NOT_RECRUITING", "COMPLETED", "ENROLLING_BY_INVITATION", "NOT_YET_RECRUITING",
+    "RECRUITING", "SUSPENDED", "TERMINATED", "WITHDRAWN", "AVAILABLE", "NO_LONGER_AVAILABLE",
+    "TEMPORARILY_NOT_AVAILABLE", "APPROVED_FOR_MARKETING", "WITHHELD", "UNKNOWN"
+})
+VALID_STUDY_TYPES = frozenset({"INTERVENTIONAL", "OBSERVATIONAL", "EXPANDED_ACCESS"})
+
+# Longest OR-joined query.cond sent in one request; longer condition lists are split
+MAX_CONDITION_QUERY_CHARS = 1500
+# Upper bound on pages followed within a single tool call
+MAX_PAGES = 5
+# (ETag, parsed page) per query, kept beyond the fetch TTL for conditional revalidation
+ETAG_CACHE_SIZE = 1024
+_etag_pages: "OrderedDict[tuple, tuple]" = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+def _enum_value(value: str) -> str:
+    """Normalize e.g. 'Not yet recruiting' to the API's NOT_YET_RECRUITING form."""
+    return value.strip().upper().replace(" ", "_").replace("-", "_")
+
+
+def _condition_terms(condition: Union[str, List[str], None]) -> List[str]:
+    """Non-blank condition names from a single condition or a list of them."""
+    if condition is None:
+        return []
+    if isinstance(condition, str):
+        condition = [condition]
+    return [c.strip() for c in condition if c and c.strip()]
+
+
+def _condition_queries(condition: Union[str, List[str], None]) -> List[Optional[str]]:
+    """
+    query.cond values covering the requested conditions: a single condition as-is,
+    several as one ("a" OR "b" ...) query, split into chunks that keep the URL short.
+    """
+    terms = _condition_terms(condition)
+    if not terms:
+        return [None]
+    if len(terms) == 1:
+        return terms
+
+    queries, chunk = [], []
+    for term in (f'"{t}"' for t in terms):
+        if chunk and len(" OR ".join(chunk)) + len(term) + 6 > MAX_CONDITION_QUERY_CHARS:
+            queries.append(chunk)
+            chunk = []
+        chunk.append(term)
+    queries.append(chunk)
+    return ["(" + " OR ".join(q) + ")" for q in queries]
+
+
+def _phase_key(phase: str) -> str:
+    """Normalize a phase input for PHASE_TERMS lookup."""
+    return phase.upper().replace(" ", "").replace("_", "")
+
+
+def _validate_trials_input(input: ClinicalTrialsToolInput) -> Optional[str]:
+    """Return an error message for inputs the API would reject, before any request is made."""
+    if not any((_condition_terms(input.condition), input.intervention, input.sponsor, input.location)):
+        return "Provide at least one of condition, intervention, sponsor or location"
+    invalid = [st for st in input.status or [] if _enum_value(st) not in VALID_STATUSES]
+    if invalid:
+        return f"Invalid status value(s) {invalid}; use one of {sorted(VALID_STATUSES)}"
+    if input.study_type and _enum_value(input.study_type) not in VALID_STUDY_TYPES:
+        return f"Invalid study_type '{input.study_type}'; use one of {sorted(VALID_STUDY_TYPES)}"
+    if input.page_size is not None and input.page_size < 1:
+        return "page_size must be at least 1"
+    if input.max_pages is not None and input.max_pages < 1:
+        return "max_pages must be at least 1"
+    return None
+
+
 @function_tool
-def clinical_trials_research_tool(input: ClinicalTrialsToolInput):
+async def clinical_trials_research_tool(input: ClinicalTrialsToolInput):
     """Search ClinicalTrials.gov for clinical trial data.
     
     Args:
@@ -194,15 +140,84 @@ def clinical_trials_research_tool(input: ClinicalTrialsToolInput):
     Returns:
         JSON string with clinical trial results
     """
-    return clinical_trials_research_logic(input)
+    # The blocking HTTP work runs on a worker thread so parallel tool calls
+    # (and the other agents sharing this event loop) aren't stalled
+    return await asyncio.to_thread(clinical_trials_research_logic, input, prefetch=True)
 
-def clinical_trials_research_logic(input: ClinicalTrialsToolInput):
+def clinical_trials_research_logic(input: ClinicalTrialsToolInput, prefetch: bool = False):
     """
     Core logic for clinical trials search, callable directly.
+    Responses are cached per distinct API query for an hour.
+
+    With `prefetch`, the next page is fetched in the background for a caller
+    (the agent) that is likely to page; direct callers that never page leave it off.
     """
-    # Base URL for ClinicalTrials.gov API v2
-    base_url = "https://clinicaltrials.gov/api/v2/studies"
-    
+    # Reject malformed searches locally instead of paying for a 400
+    validation_error = _validate_trials_input(input)
+    if validation_error:
+        return dumps({"error": validation_error})
+
+    params = _build_params(input)
+    max_pages = min(input.max_pages or 1, MAX_PAGES)
+    # Several conditions are searched with OR in one request (or a few, if very long)
+    requested = _condition_terms(input.condition) if isinstance(input.condition, list) else None
+    cond_queries = _condition_queries(input.condition)
+    param_sets = [
+        {**params, "query.cond": cond_query} if cond_query else params
+        for cond_query in cond_queries
+    ]
+
+    try:
+        # Page chains are sequential (each page carries the next token), but
+        # separate condition chunks are independent and fetched side by side
+        if len(param_sets) == 1:
+            chains = [_fetch_pages(param_sets[0], max_pages)]
+        else:
+            chains = list(IO_POOL.map(lambda ps: _fetch_pages(ps, max_pages), param_sets))
+
+        simplified_studies = []
+        seen = set()
+        for studies, _ in chains:
+            for study in studies:
+                nct_id = study["nctId"]
+                if nct_id is not None:
+                    if nct_id in seen:
+                        continue
+                    seen.add(nct_id)
+                if requested:
+                    # Copy before tagging; the fetched list is shared through the cache
+                    study = {**study, "matchedConditions": _matched_conditions(requested, study["conditions"])}
+                simplified_studies.append(study)
+
+        # A continuation token is only meaningful for a single query chain
+        next_token = chains[0][1] if len(chains) == 1 else None
+        if prefetch and next_token:
+            # Warm the cache with the next page while the agent reads this one; a follow-up
+            # call with page_token=next_token hits the cache (or joins this fetch)
+            IO_POOL.submit(_fetch, tuple(sorted({**param_sets[0], "pageToken": next_token}.items())))
+        return dumps({"studies": simplified_studies, "nextPageToken": next_token})
+        
+    except Exception as e:
+        return dumps({"error": f"Clinical Trials API failed: {str(e)}"})
+
+
+def _fetch_pages(params: Dict[str, Any], max_pages: int):
+    """Follow nextPageToken for up to max_pages pages; returns (studies, next_token)."""
+    studies: List[Dict[str, Any]] = []
+    page_params = dict(params)
+    next_token = None
+    for _ in range(max_pages):
+        page = _fetch(tuple(sorted(page_params.items())))
+        studies.extend(page["studies"])
+        next_token = page["nextPageToken"]
+        if not next_token:
+            break
+        page_params["pageToken"] = next_token
+    return studies, next_token
+
+
+def _build_params(input: ClinicalTrialsToolInput) -> Dict[str, Any]:
+    """Translate a validated tool input into ClinicalTrials.gov v2 query parameters."""
     # Build query parameters
     params = {
         "format": "json",
@@ -212,33 +227,12 @@ def clinical_trials_research_logic(input: ClinicalTrialsToolInput):
     if input.page_token:
         params["pageToken"] = input.page_token
         
-    # Construct filters
-    filters = []
-    
-    # Condition/Disease
-    if input.condition:
-        filters.append(f"cond={input.condition}")
-        
-    # Intervention/Drug
-    if input.intervention:
-        filters.append(f"int={input.intervention}")
-        
-    # Location
-    if input.location:
-        filters.append(f"locn={input.location}")
-        
-    # Sponsor
-    if input.sponsor:
-        filters.append(f"spons={input.sponsor}")
-        
     # Status - Use filter.overallStatus
     if input.status:
-        status_str = ",".join(input.status)
+        status_str = ",".join(_enum_value(st) for st in input.status)
         params["filter.overallStatus"] = status_str
         
-    # Add specific parameters to dict
-    if input.condition:
-        params["query.cond"] = input.condition
+    # Add specific parameters to dict (query.cond is set per condition query by the caller)
     if input.intervention:
         params["query.intr"] = input.intervention  # FIXED: Changed from query.int to query.intr
     if input.location:
@@ -246,17 +240,14 @@ def clinical_trials_research_logic(input: ClinicalTrialsToolInput):
     if input.sponsor:
         params["query.spons"] = input.sponsor
     if input.study_type:
-        params["filter.studyType"] = input.study_type
+        params["filter.studyType"] = _enum_value(input.study_type)
 
     # Phase - No direct parameter in V2, use query.term
     # Map PHASE1, PHASE2, etc. to search terms
     if input.phase:
-        phase_terms = []
-        for p in input.phase:
-            if "1" in p: phase_terms.append('"Phase 1"')
-            if "2" in p: phase_terms.append('"Phase 2"')
-            if "3" in p: phase_terms.append('"Phase 3"')
-            if "4" in p: phase_terms.append('"Phase 4"')
+        phase_terms = list(dict.fromkeys(
+            PHASE_TERMS[key] for key in map(_phase_key, input.phase) if key in PHASE_TERMS
+        ))
         
         if phase_terms:
             # Add to existing term query or create new
@@ -264,58 +255,124 @@ def clinical_trials_research_logic(input: ClinicalTrialsToolInput):
             params["query.term"] = phase_query
 
     # Fields to return (to reduce payload)
-    fields = [
-        "protocolSection.identificationModule.nctId",
-        "protocolSection.identificationModule.briefTitle",
-        "protocolSection.identificationModule.officialTitle",
-        "protocolSection.statusModule.overallStatus",
-        "protocolSection.designModule.phases",
-        "protocolSection.designModule.studyType",
-        "protocolSection.conditionsModule.conditions",
-        "protocolSection.armsInterventionsModule.interventions",
-        "protocolSection.outcomesModule.primaryOutcomes",
-        "protocolSection.eligibilityModule.eligibilityCriteria"
-    ]
-    params["fields"] = "|".join(fields)
+    params["fields"] = CT_FIELDS
+    return params
 
-    headers = {"User-Agent": "pharma-researcher/1.0"}
 
-    try:
-        response = requests.get(base_url, params=params, headers=headers, timeout=30)
+@ttl_cache(maxsize=512, ttl=3600)
+def _fetch(params: tuple) -> Dict[str, Any]:
+    """
+    GET one page of studies and simplify it, returning
+    {"studies": [...], "nextPageToken": str | None}. Keyed on the sorted parameter
+    tuple, so inputs that normalize to the same query share one request.
+    Failures raise and are not cached.
+
+    Once the TTL cache entry expires, the page is revalidated with
+    If-None-Match; a 304 reuses the previously parsed page.
+    """
+    validator = _etag_get(params)
+    headers = {"If-None-Match": validator[0]} if validator else None
+
+    with SESSION.get(CT_BASE_URL, params=dict(params), headers=headers, timeout=30, stream=ijson is not None) as response:
+        if response.status_code == 304 and validator:
+            return validator[1]
         response.raise_for_status()
-        data = response.json()
-        
-        # Extract relevant studies
-        studies = data.get("studies", [])
-        
-        # Post-process to simplify structure
-        simplified_studies = []
-        for study in studies:
-            protocol = study.get("protocolSection", {})
-            id_mod = protocol.get("identificationModule", {})
-            status_mod = protocol.get("statusModule", {})
-            design_mod = protocol.get("designModule", {})
-            cond_mod = protocol.get("conditionsModule", {})
-            int_mod = protocol.get("armsInterventionsModule", {})
-            
-            simplified = {
-                "nctId": id_mod.get("nctId"),
-                "briefTitle": id_mod.get("briefTitle"),
-                "status": status_mod.get("overallStatus"),
-                "phases": design_mod.get("phases", []),
-                "conditions": cond_mod.get("conditions", []),
-                "interventions": [i.get("name") for i in int_mod.get("interventions", [])]
-            }
-            simplified_studies.append(simplified)
-            
-        return json.dumps(simplified_studies, indent=2)
+        page_meta: Dict[str, Any] = {}
+        studies = _simplify_studies(_iter_studies(response, page_meta))
+        etag = response.headers.get("ETag")
+
+    page = {"studies": studies, "nextPageToken": page_meta.get("nextPageToken")}
+    if etag:
+        _etag_put(params, etag, page)
+    return page
+
+
+def _etag_get(params: tuple):
+    with _etag_lock:
+        entry = _etag_pages.get(params)
+        if entry is not None:
+            _etag_pages.move_to_end(params)
+        return entry
+
+
+def _etag_put(params: tuple, etag: str, page: Dict[str, Any]) -> None:
+    with _etag_lock:
+        _etag_pages[params] = (etag, page)
+        _etag_pages.move_to_end(params)
+        while len(_etag_pages) > ETAG_CACHE_SIZE:
+            _etag_pages.popitem(last=False)
+
+
+def _matched_conditions(requested: List[str], study_conditions: List[str]) -> List[str]:
+    """Which requested conditions appear in a study's condition list (case-insensitive substring)."""
+    lowered = [c.lower() for c in study_conditions]
+    return [r for r in requested if any(r.lower() in c for c in lowered)]
+
+
+def _iter_studies(response, page_meta: Dict[str, Any]):
+    """
+    Yield study records from a ClinicalTrials.gov v2 response and record the
+    page's nextPageToken in page_meta once the body has been consumed.
+
+    With ijson installed the body is pull-parsed one study at a time, so the
+    full response tree is never held in memory; otherwise it is parsed whole.
+    """
+    if ijson is not None:
+        response.raw.decode_content = True
+        builder = None
+        for prefix, event, value in ijson.parse(response.raw):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == "studies.item" and event == "end_map":
+                    yield builder.value
+                    builder = None
+            elif prefix == "studies.item" and event == "start_map":
+                builder = ijson.common.ObjectBuilder()
+                builder.event(event, value)
+            elif prefix == "nextPageToken":
+                page_meta["nextPageToken"] = value
+    else:
+        data = loads(response.content)
+        page_meta["nextPageToken"] = data.get("nextPageToken")
+        yield from data.get("studies", [])
+
+
+def _simplify_studies(studies) -> List[Dict[str, Any]]:
+    """Flatten study records to the fields the agent reports on."""
+    simplified_studies = []
+    for study in studies:
+        protocol = study.get("protocolSection", {})
+        id_mod = protocol.get("identificationModule", {})
+        status_mod = protocol.get("statusModule", {})
+        design_mod = protocol.get("designModule", {})
+        cond_mod = protocol.get("conditionsModule", {})
+        int_mod = protocol.get("armsInterventionsModule", {})
         
-    except Exception as e:
-        return json.dumps({"error": f"Clinical Trials API failed: {str(e)}"})
-
-clinical_trails_research_agent = Agent(
-    name="clinical_trails_research_agent",
-    instructions=INSTRUCTIONS,
-    model="gpt-4o-mini",
-    tools=[clinical_trials_research_tool]
-)
\ No newline at end of file
+        simplified = {
+            "nctId": id_mod.get("nctId"),
+            "briefTitle": id_mod.get("briefTitle"),
+            "status": status_mod.get("overallStatus"),
+            "phases": design_mod.get("phases", []),
+            "conditions": cond_mod.get("conditions", []),
+            "interventions": [i.get("name") for i in int_mod.get("interventions", [])]
+        }
+        simplified_studies.append(simplified)
+    return simplified_studies
+
+
+@cache
+def get_clinical_trials_agent() -> Agent:
+    """Build the clinical trials agent on first use and reuse it afterwards."""
+    return Agent(
+        name="clinical_trails_research_agent",
+        instructions=INSTRUCTIONS,
+        model="gpt-4o-mini",
+        tools=[clinical_trials_research_tool]
+    )
+
+
+def __getattr__(name: str):
+    # Keep `from ... import clinical_trails_research_agent` working without building it at import
+    if name == "clinical_trails_research_agent":
+        return get_clinical_trials_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
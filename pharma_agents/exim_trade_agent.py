@@ -1,122 +1,43 @@
 from agents import Agent, function_tool
-import requests
-import json
-import os
 import dotenv
-from typing import Optional, Dict, Any, Union
+from pharma_agents.tools.serper import serper_search, serper_search_batch
+from pharma_agents.prompts import load_prompt
+from pharma_agents.tools.json_utils import dumps, loads, is_error_payload
+from pharma_agents.tools.cache import ttl_cache
+from pharma_agents.tools.tool_budget import budgeted, take_budget, BUDGET_EXHAUSTED
+from pharma_agents.tools.hs_codes import hs_category_lookup
+import asyncio
+from typing import Optional, Dict, Any, Union, List
 
 dotenv.load_dotenv(override=True)
 
-INSTRUCTIONS = """
-   You are a GLOBAL PHARMACEUTICAL TRADE INTELLIGENCE AGENT focused on EXIM (Export–Import) analytics.
-
-   ROLE:
-   Your job is to transform real trade logs from HS-coded customs datasets into **clear insights that directly
-   inform drug repurposing feasibility, supply risk, and global manufacturing dependencies**.
-
-   --------------------------------
-   MANDATORY REASONING FLOW (ALWAYS FOLLOW)
-   --------------------------------
-
-   When you receive tool output, reason in this order:
-
-   1. **HS CODE → TRADE CATEGORY**
-      - Determine what that HS code represents in pharmaceutical terms (APIs vs formulations vs biologics).
-      - Use only reliable and persistent HS categories (2/4/6 digit level) to maintain global coverage.
-
-   2. **TRADE FLOW DIRECTION**
-      - Separate **Import (M)** and **Export (X)** signals clearly.
-      - Quantify trends *only from real tool results* — never estimates.
-
-   3. **PARTNER & REPORTER NETWORK**
-      - Identify top partner countries by value, shipment corridors, and sourcing concentrators.
-      - Highlight global supply signals such as:
-      • dominant API source hubs
-      • formulation export leaders
-      • regional dependency clusters
-
-   4. **SUPPLY RISK DETECTION**
-      Mark risk categories based on:
-      • Undiversified sourcing (1–2 countries dominating >70% trade value)
-      • Single port/shipment corridor dependency
-      • Year-over-year import spikes indicating domestic production gaps
-      • Export dominance without matching API production capacity
-      • Sensitivity to disruption based on sourcing centralization
-
-      Use intuitive labels:
-      🔴 High risk, 🟡 Moderate risk, 🟢 Low risk
-
-   5. **RELEVANCE TO REPURPOSING**
-      Convert your insights into practical conclusions for repurposing scientists:
-      ✅ If supply chains support fast repurposing translation (stable API access, global formulation coverage)
-      ❌ If supply risks make the repurposing plan impractical right now
-      🧪 If supply is possible but needs diversification strategy before proceeding
-   
-   ***IF ONE TOOL GIVES ERROR OR NO OUTPUT, TRY SEARCHING WITH ANOTHER TOOL.***
-
-   --------------------------------
-   OUTPUT REQUIREMENTS
-   --------------------------------
-
-   Your response must contain:
-
-   1. **Year-by-Year Trend Table** (based only on real tool data)
-      Columns:
-      - Year
-      - Import Value (USD)
-      - Export Value (USD)
-      - Leading Partner(s)
-
-   2. **Top 3 Corridor Summary** (short)
-      - Country A → B value corridors
-      - What is being shipped (API vs formulation)
-      - Why it matters (dependency or opportunity)
-
-   3. **Supply Practical Insights** (3–8 bullet points)
-      Include things like:
-      - “China dominates API imports at HS 2937 (hormones) — indicating concentrated supply risk”
-      - “India is a top exporter of HS 3004 formulations — strong signal for repurposing deployment”
-      - “Imports spiked 2.4× post-2019 — domestic manufacturing gap signal, useful for repurposing risk modeling”
-
-   4. **Risk Flag Summary** (short)
-      - One line for sourcing centralization risk
-      - One line for export deployment practicality
-      - One line for disruption sensitivity
-
-   5. **Final Supply Feasibility Score for Repurposing (0.0–1.0)** (float)
-      Score rationale should consider:
-      (a) supply stability
-      (b) target drug category coverage
-      (c) partner diversification
-      (d) redeployment practicality
-      (e) safety non-conflict if mentioned in context
-
-   --------------------------------
-   STRICT SAFETY RULES
-   --------------------------------
-
-   - Never invent countries, values, or shipment corridors.
-   - Do not call patents or clinical trial tools — only reason from EXIM intelligence.
-   - If the tool returned an error or no trade rows:
-   Write this only:
-   “No robust EXIM trade intelligence was found for this HS code and year.”
-   - Ensure your insights are *usable as future pipeline context* for other agents.
-   - Do not surround responses with JSON — natural readable output only.
-
-   --------------------------------
-   STYLE
-   --------------------------------
-
-   - Tone: intuitive, analytical, industry-useful but academically suitable
-   - Include clean tables and key bullet insights
-   - Focus on actionable decisions, not background history
-
-   If UN Comtrade tool gives you error, try searching with serper
-"""
+# Cap on queries fanned out by one trade_search_batch_tool call
+MAX_BATCH_QUERIES = 10
+# Trade search results barely move within a day; errors are never cached
+TRADE_CACHE_TTL = 24 * 3600
+# Plausible range for trade-data years
+MIN_TRADE_YEAR, MAX_TRADE_YEAR = 1990, 2100
+
+INSTRUCTIONS = load_prompt("exim_trade")
+
+
+@function_tool
+def hs_category_tool(hs_code: str) -> str:
+    """
+    Look up what an HS code represents in pharmaceutical trade terms (API, formulation, biologic, ...).
+    
+    Args:
+        hs_code: The HS code (2, 4 or 6 digits, e.g. '2937' or '3004.90')
+    """
+    category = hs_category_lookup(hs_code)
+    if category is None:
+        return dumps({"error": f"HS code '{hs_code}' is not in a pharmaceutical chapter (29/30)."})
+    return dumps(category)
 
 
 @function_tool
-def serper_trade_tool(
+@budgeted
+async def serper_trade_tool(
     hs_code: str,
     year: int = 2024,
     flow: Optional[str] = None
@@ -130,8 +51,13 @@ def serper_trade_tool(
         year: The year to focus the search on (default 2024)
         flow: Optional flow direction 'import' or 'export'
     """
-    return serper_trade_tool_logic(hs_code, year, flow)
+    return await asyncio.to_thread(serper_trade_tool_logic, hs_code, year, flow)
+
+def _trade_cache_key(hs_code: str, year: int = 2024, flow: Optional[str] = None):
+    return ((hs_code or "").strip().lower(), year, (flow or "").strip().lower())
 
+
+@ttl_cache(maxsize=512, ttl=TRADE_CACHE_TTL, key=_trade_cache_key, cache_if=lambda r: not is_error_payload(r))
 def serper_trade_tool_logic(
     hs_code: str,
     year: int = 2024,
@@ -139,65 +65,71 @@ def serper_trade_tool_logic(
 ) -> str:
     """
     Core logic for trade search, callable directly.
+    Results are cached per (hs_code, year, flow) for a day.
     """
+    # Reject malformed calls before any request is made
+    if not hs_code or not hs_code.strip():
+        return dumps({"error": "hs_code is required (an HS code or drug name)."})
+    if not MIN_TRADE_YEAR <= year <= MAX_TRADE_YEAR:
+        return dumps({"error": f"year must be between {MIN_TRADE_YEAR} and {MAX_TRADE_YEAR}."})
+
     # Construct a targeted search query
-    query_parts = [f"{hs_code} trade data {year}"]
-    if flow:
-        query_parts.append(f"{flow} statistics")
-    else:
-        query_parts.append("export import trends")
-    
-    query_parts.append("top countries value")
-    
-    search_query = " ".join(query_parts)
-    
-    url = "https://google.serper.dev/search"
-    payload = json.dumps({"q": search_query})
-    
-    api_key = os.environ.get("SERPER_API_KEY")
-    if not api_key:
-        return json.dumps({"error": "Missing SERPER_API_KEY environment variable."})
-        
-    headers = {
-        'X-API-KEY': api_key,
-        'Content-Type': 'application/json'
-    }
-
-    try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
-        response.raise_for_status()
-        return response.text
-    except Exception as e:
-        return json.dumps({"error": f"Search failed: {str(e)}"})
+    flow_terms = f"{flow} statistics" if flow else "export import trends"
+    search_query = f"{hs_code.strip()} trade data {year} {flow_terms} top countries value"
+    return serper_search(search_query)
 
 @function_tool
-def trade_search_tool(query: str):
+@budgeted
+async def trade_search_tool(query: str):
     """Search for market insights and pharmaceutical data using web search.
     
     Args:
         query: The search query string
     """
-    url = "https://google.serper.dev/search"
+    return await asyncio.to_thread(trade_search_logic, query)
 
-    payload = json.dumps({
-        "q": query
-    })
-    api_key=os.environ.get("SERPER_API_KEY")
-    if not api_key:
-        return json.dumps({"error": "No API key found."})
-    headers = {
-        'X-API-KEY': api_key,
-        'Content-Type': 'application/json'
-    }
 
-    response = requests.request("POST", url, headers=headers, data=payload)
-
-    return response.text
+@function_tool
+async def trade_search_batch_tool(queries: List[str]) -> str:
+    """Run several trade searches in one request (e.g. one per year or per HS code) instead of one call each.
+    
+    Args:
+        queries: The search query strings (at most 10)
+    
+    Returns:
+        JSON list of {"query", "result"} objects in the same order as the queries
+    """
+    queries = [q for q in queries if q and q.strip()][:MAX_BATCH_QUERIES]
+    if not queries:
+        return dumps({"error": "queries must contain at least one non-empty query."})
+    # Each query costs one tool call; queries beyond the remaining budget are refused
+    granted = take_budget(len(queries))
+    if granted == 0:
+        return BUDGET_EXHAUSTED
+    queries, refused = queries[:granted], queries[granted:]
+    results = await asyncio.to_thread(serper_search_batch, queries)
+    if results is None:
+        # Batch request failed; fall back to concurrent single searches
+        texts = await asyncio.gather(*(asyncio.to_thread(trade_search_logic, q) for q in queries))
+        results = [loads(t) for t in texts]
+    refused_result = loads(BUDGET_EXHAUSTED)
+    return dumps([{"query": q, "result": r} for q, r in zip(queries, results)]
+                 + [{"query": q, "result": refused_result} for q in refused])
+
+
+@ttl_cache(maxsize=512, ttl=TRADE_CACHE_TTL, key=lambda query: query.strip().lower(), cache_if=lambda r: not is_error_payload(r))
+def trade_search_logic(query: str) -> str:
+    """
+    Core logic for a free-form trade search, callable directly.
+    """
+    if not query or not query.strip():
+        return dumps({"error": "query is required."})
+    return serper_search(query)
 
 
 exim_trade_agent = Agent(
     name="exim_trade_agent",
     instructions=INSTRUCTIONS,
     model="gpt-4o-mini",
-    tools=[trade_search_tool, serper_trade_tool]
+    tools=[hs_category_tool, trade_search_tool, trade_search_batch_tool, serper_trade_tool]
 )
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Deterministic on-disk cache of agent outputs.
+
+Entries are keyed by SHA-256 of (agent name, model, instructions, tools,
+prompt), so re-running the pipeline for the same disease/drug reuses earlier
+LLM responses instead of paying for them again, while an edited prompt file
+or tool list misses. Off by default; set PHARMA_LLM_CACHE=1 to enable it
+(meant for development and evaluation runs, not the served app).
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+CACHE_DIR = Path(os.getenv("PHARMA_CACHE_DIR", ".cache"))
+CACHE_TTL = float(os.getenv("PHARMA_CACHE_TTL", "86400"))
+
+logger = logging.getLogger(__name__)
+
+_stats = {"hits": 0, "misses": 0}
+
+
+def _enabled() -> bool:
+    return os.getenv("PHARMA_LLM_CACHE") == "1"
+
+
+def _instructions_text(agent) -> str:
+    # Dynamic (callable) instructions are identified by their qualified name
+    instructions = getattr(agent, "instructions", None)
+    if instructions is None or isinstance(instructions, str):
+        return instructions or ""
+    return getattr(instructions, "__qualname__", repr(instructions))
+
+
+def cache_key(agent, prompt: str) -> str:
+    """Stable key for an agent run; changes whenever the model, instructions, tools or prompt do."""
+    payload = json.dumps(
+        {
+            "agent": agent.name,
+            "model": str(getattr(agent, "model", "") or ""),
+            "instructions": hashlib.sha256(_instructions_text(agent).encode("utf-8")).hexdigest(),
+            "tools": sorted(getattr(t, "name", str(t)) for t in getattr(agent, "tools", None) or []),
+            "prompt": prompt,
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_path(agent, prompt: str) -> Path:
+    return CACHE_DIR / f"{cache_key(agent, prompt)}.txt"
+
+
+def get_cached_output(agent, prompt: str) -> Optional[str]:
+    """Return a fresh cached output for this agent/prompt, or None."""
+    if not _enabled():
+        return None
+    path = _cache_path(agent, prompt)
+    try:
+        if time.time() - path.stat().st_mtime < CACHE_TTL:
+            output = path.read_text(encoding="utf-8")
+            _stats["hits"] += 1
+            return output
+    except OSError:
+        pass
+    _stats["misses"] += 1
+    return None
+
+
+def store_output(agent, prompt: str, output: str) -> None:
+    """Write an output atomically so a concurrent reader never sees a partial file."""
+    if not _enabled() or not output:
+        return
+    path = _cache_path(agent, prompt)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(output, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write {path.name}: {e}")
+
+
+def cache_stats() -> Dict[str, int]:
+    """Hit/miss counts for this process."""
+    return dict(_stats)
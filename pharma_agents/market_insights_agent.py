@@ -1,171 +1,43 @@
 from agents import Agent, function_tool
-import requests
-import json
-import os
 import dotenv
+from pharma_agents.tools.serper import serper_search
+from pharma_agents.prompts import load_prompt
+import asyncio
+from pharma_agents.tools.json_utils import is_error_payload
+from pharma_agents.tools.cache import ttl_cache
+from pharma_agents.tools.tool_budget import budgeted
 
 dotenv.load_dotenv(override=True)
 
-INSTRUCTIONS = """
-You are a GLOBAL PHARMACEUTICAL MARKET & REGULATORY INTELLIGENCE AGENT.
-
-ROLE:
-Your mission is to turn **real regulatory + market data** into **practical, evidence-linked,
-repurposing-relevant insights**. You focus on approvals, safety actions, competitive deployment,
-and product-lifecycle feasibility across the world.
-
-DATA ACCESS & PRIORITY:
-- You can use regulatory intelligence tools for:
-  * US approval, labeling, safety actions -> FDA sources  
-  * EU approval, indications, safety signals -> EMA/Europe region sources  
-  * Global standard indications and safety notices -> WHO-grade context if provided  
-  * Competitive market intelligence -> prescription trends, formulation deployment, manufacturer landscape  
-- You DO NOT use patent or clinical-trial tools in this agent.
-- You MUST extract **REAL data via your assigned tools**, never fabricate values.
-
---------------------------------
-MANDATORY PRACTICAL REASONING FLOW
---------------------------------
-
-When tool results are returned, you reason only like:
-
-1. **APPROVAL & INDICATION STATUS**
-   - List approved indications per region
-   - Identify if withdrawn/suspended/black-boxed anywhere
-   - Capture product description or label summary only if returned
-
-2. **SAFETY ACTION MINING**
-   - Extract:
-     * boxed warnings
-     * contraindications
-     * recalls or withdrawal notices
-     * pharmacovigilance flags if provided
-   - Convert them into repurposing feasibility statements
-     (e.g., "GLP-1 class drugs carry boxed warnings for thyroid cancer in US -- filter out for endocrine oncology repurposing ideas.")
-
-3. **FORMULATION & MARKET DEPLOYMENT**
-   - Identify available forms or modalities in major markets (tablets, injectables, biologics, etc.)
-   - Highlight which formulations show global deployment practicality
-   - Note manufacturer or country leaders if present
-
-4. **GLOBAL COMPETITOR INTELLIGENCE**
-   - Concentrate on:
-     * dual-benefit competitors (metabolic + cardio, renal + metabolic)
-     * market adoption signals
-     * under-penetrated geographies or formulations
-     (*only if you see reliable support*)
-
-5. **PRACTICAL REPURPOSING MARKET LENS**
-   For a given drug/disease query, your answer must include:
-
-   [YES] **Regulatory-backed redeployment signals**, like:
-      - "Approved for metabolic disease with secondary cardiovascular indication -- high practical redeployment potential for multi-comorbidity repurposing."
-      - "Only approved for 1 indication, limited forms, and regional safety alerts -- moderate redeployment practicality, but good for ML subgroup mining."
-
-   [NO] **Poor repurposing feasibility**, like:
-      - "Withdrawn/suspended in major economies -- not safe or practical for repurposing deployment."
-
-   [MAYBE] **Data-supported but constrained practicality**, like:
-      - "Approved drug class supports mechanistic adjacency, but sourcing centralization or safety overlap means -- run retrospective cohort mining first."
-
---------------------------------
-OUTPUT REQUIREMENTS
---------------------------------
-
-Your output should always contain:
-
-1. **Approval Table (Global Regions)** -- only if data was returned
-   Columns: Region, Approval Year/Date, Indication(s), Notes (Withdrawal/Recall if present)
-
-2. **Competitive Market Table** -- only if data was returned
-   Columns: Competitor Class, Key Benefit Overlap, Market Adoption Notes
-
-3. **Practical Market Insights** (5-10 bullet points)
-   Example bullets:
-   - "US label contraindicates severe renal impairment -- impacts feasibility for diabetic nephropathy repurposing cohort filters."
-   - "EU approval includes chronic weight management -- formulation scalability for appetite-adjacent repurposing ML features."
-   - "Market leaders emphasize cardiometabolic dual therapy -- practical angle for multi-comorbidity redeployment modeling."
-   - "No regulatory suspension detected -- practical for downstream mechanistic agents."
-
-4. **1 Repurposing Market Practical Score (0.0-1.0)** (float)
-   Score reflects:
-   (a) regulatory stability
-   (b) market deployment breadth
-   (c) safety non-conflict
-   (d) redeployment practicality
-
---------------------------------
-NO-FABRICATION BEHAVIOR
---------------------------------
-
-If tools return:
-- error
-- empty results
-- unrelated trial/market data
-
-You MUST respond only with:
-"Regulatory or market deployment data not found via tools for this query. Cannot derive practical repurposing insights from regulatory deployment context."
-
---------------------------------
-ANTI-LOOP GUARD
---------------------------------
-
-- Detect repetitive self-reasoning loops
-- Summarize instead of expanding
-- Never exceed 3 tool calls per query attempt
-
---------------------------------
-STYLE
---------------------------------
-
-- Analytical but intuitive, no formal fluff
-- Industry + academic usable tone
-- Keep the focus on practicality of redeployment, not backstory
-- Tables must reflect ONLY tool-returned data
-"""
+INSTRUCTIONS = load_prompt("market_insights")
 
 
 @function_tool
-def market_insights_tool(query: str):
+@budgeted
+async def market_insights_tool(query: str):
     """Search for market insights, sales data, and pharmaceutical trends using web search.
     
     Args:
         query: The search query string (e.g. "Metformin global sales 2024")
     """
-    return market_insights_tool_logic(query)
+    return await asyncio.to_thread(market_insights_tool_logic, query)
 
+@ttl_cache(maxsize=512, ttl=24 * 3600, key=lambda query: query.strip().lower(), cache_if=lambda r: not is_error_payload(r))
 def market_insights_tool_logic(query: str):
     """
     Core logic for market insights search, callable directly.
+    Results are cached per normalized query for a day.
     """
     # Enhance query for sales data if it looks like a sales request
     search_query = query
-    if "sales" in query.lower() or "revenue" in query.lower():
-        if "global" not in query.lower():
+    query_lower = query.lower()
+    if "sales" in query_lower or "revenue" in query_lower:
+        if "global" not in query_lower:
             search_query += " global sales revenue"
         if "202" not in query:  # If no recent year specified
             search_query += " 2024"
-            
-    url = "https://google.serper.dev/search"
-
-    payload = json.dumps({
-        "q": search_query
-    })
-    api_key=os.environ.get("SERPER_API_KEY")
-    if not api_key:
-        return json.dumps({"error": "No API key found."})
-        
-    headers = {
-        'X-API-KEY': api_key,
-        'Content-Type': 'application/json'
-    }
 
-    try:
-        response = requests.post(url, headers=headers, data=payload, timeout=15)
-        response.raise_for_status()
-        return response.text
-    except Exception as e:
-        return json.dumps({"error": f"Search failed: {str(e)}"})
+    return serper_search(search_query)
 
 market_insights_agent = Agent(
     name="market_insights_agent",
@@ -1,13 +1,21 @@
 from agents import Agent, function_tool
+import asyncio
 import requests
-import json
-import os
 from typing import Optional, Dict, Any, Union
 import dotenv
 import re
+from functools import lru_cache
+from pharma_agents.tools.json_utils import dumps, loads, is_error_payload
+from pharma_agents.tools.cache import ttl_cache
+from pharma_agents.tools.tool_budget import budgeted
+from pharma_agents.tools.serper import serper_post, SERPER_PATENTS_URL, MISSING_KEY_ERROR
 
 dotenv.load_dotenv(override=True)
 
+# Patent number (e.g. US1234567, EP1234567) and assignee phrases in search results
+_PATENT_NUM_RE = re.compile(r'(?:US|EP|WO|CN|JP)\s*\d{6,}')
+_ASSIGNEE_RE = re.compile(r'(?:filed by|assigned to|owned by)\s+([A-Z][A-Za-z\s&,\.]+?)(?:\.|,|\s-)')
+
 INSTRUCTIONS = """
 You are a GLOBAL PATENT INTELLIGENCE AGENT for drug repurposing.
 
@@ -139,9 +147,11 @@ class PharmaKeywordExtractor:
         return drug, disease
 
 
+_keyword_extractor = PharmaKeywordExtractor()
+
+
 def build_patent_query(raw_query: str) -> str:
-    extractor = PharmaKeywordExtractor()
-    drug, disease = extractor.extract(raw_query)
+    drug, disease = _keyword_extractor.extract(raw_query)
 
     # Practical, search-friendly prompt building
     if drug and disease:
@@ -159,32 +169,34 @@ def build_patent_query(raw_query: str) -> str:
 
 
 @function_tool
-def serper_patent_tool(query: str):
+@budgeted
+async def serper_patent_tool(query: str):
     """Search for patent information using web search.
     
     Args:
         query: The search query string
     """
-    url = "https://google.serper.dev/patents"
+    return await asyncio.to_thread(serper_patent_logic, query)
 
-    payload = json.dumps({
+
+def serper_patent_logic(query: str) -> str:
+    """Core logic for the Serper patents search."""
+    payload = dumps({
         "q": build_patent_query(query)
     })
-    headers = {
-        'X-API-KEY': os.environ.get("SERPER_API_KEY"),
-        'Content-Type': 'application/json'
-    }
 
     try:
-        response = requests.request("POST", url, headers=headers, data=payload)
-        response.raise_for_status()
+        response = serper_post(payload, SERPER_PATENTS_URL, timeout=30)
+        if response is None:
+            return MISSING_KEY_ERROR
         return response.text
     except Exception as e:
-        return json.dumps({"error": f"Serper Patent Search failed: {str(e)}"})
+        return dumps({"error": f"Serper Patent Search failed: {str(e)}"})
 
 
 @function_tool
-def patents_view_api_tool(
+@budgeted
+async def patents_view_api_tool(
     keyword: str,
     max_results: int = 25,
     from_date: Optional[str] = None
@@ -200,151 +212,25 @@ def patents_view_api_tool(
     Returns:
         JSON string with patent results and metadata
     """
-    return patents_view_api_logic(keyword, max_results, from_date)
-
-
-# def patents_view_api_logic(
-#     keyword: str,
-#     max_results: int = 25,
-#     from_date: Optional[str] = None
-# ) -> str:
-#     """
-#     Core logic for patent search, callable directly.
-#     """
-#     # Validate inputs
-#     if not keyword or not keyword.strip():
-#         return json.dumps({"error": "Keyword is required and cannot be empty"})
-    
-#     max_results = min(max_results or 25, 100)
-
-#     # API Key
-#     api_key = os.getenv("PATENTS_VIEW_API_KEY")
-#     if not api_key:
-#         return json.dumps({
-#             "error": "Missing PATENTS_VIEW_API_KEY environment variable. Please set it in your .env file."
-#         })
-
-#     # Parse keyword
-#     keyword_clean = keyword.strip()
-#     keyword_words = keyword_clean.split()
-    
-#     # Determine search strategy
-#     if len(keyword_words) == 1:
-#         text_operator = "_text_phrase"
-#     elif len(keyword_words) <= 3:
-#         text_operator = "_text_phrase"
-#     else:
-#         text_operator = "_text_all"
-    
-#     # Main search conditions - NO CPC FILTERING (causes 400/500 errors)
-#     main_search_conditions = [
-#         {text_operator: {"patent_title": keyword_clean}},
-#         {text_operator: {"patent_abstract": keyword_clean}}
-#     ]
-    
-#     # Build query structure
-#     query_parts = []
-    
-#     # Add main search (title OR abstract must contain keywords)
-#     query_parts.append({"_or": main_search_conditions})
-    
-#     # Add date filter if provided
-#     if from_date:
-#         query_parts.append({"_gte": {"patent_date": from_date}})
-    
-#     # Combine all conditions with AND
-#     if len(query_parts) == 1:
-#         query_dict = query_parts[0]
-#     else:
-#         query_dict = {"_and": query_parts}
-
-#     # API endpoint
-#     url = "https://search.patentsview.org/api/v1/patent"
-
-#     # Fields to return - focus on pharmaceutical-relevant info
-#     # Use cpc_current instead of cpc_group_id/title
-#     fields = [
-#         "patent_id",
-#         "patent_number",
-#         "patent_title",
-#         "patent_abstract",
-#         "patent_date",
-#         "patent_type",
-#         "patent_kind",
-#         "assignees",
-#         "inventors",
-#         "cpc_current"
-#     ]
-
-#     # Sort by relevance: prioritize patents with keywords in title, then by date
-#     sort = [{"patent_date": "desc"}]
-
-#     # Build request params
-#     params = {
-#         "q": json.dumps(query_dict),
-#         "f": json.dumps(fields),
-#         "s": json.dumps(sort),
-#         "o": json.dumps({
-#             "size": max_results,
-#             "exclude_withdrawn": True,
-#             "pad_patent_id": False
-#         })
-#     }
-
-#     # Headers
-#     headers = {
-#         "User-Agent": "pharma-researcher/1.0",
-#         "Content-Type": "application/json",
-#         "Accept": "application/json",
-#         "X-Api-Key": api_key
-#     }
-
-#     try:
-#         # Request without CPC filtering
-#         response = requests.get(url, headers=headers, params=params, timeout=30)
-        
-#         if response.status_code != 200:
-#             return json.dumps({
-#                 "error": f"API Error {response.status_code}",
-#                 "details": response.text
-#             })
-            
-#         data = response.json()
-#         patents = data.get("patents", [])
-        
-#         # Post-process to extract CPC codes from nested structure
-#         processed_patents = []
-#         for p in patents:
-#             # Extract CPC codes from cpc_current list of objects
-#             cpc_list = p.get("cpc_current", [])
-#             cpc_codes = []
-#             if cpc_list:
-#                 # Extract group_id from each object
-#                 cpc_codes = [item.get("cpc_group_id") for item in cpc_list if item.get("cpc_group_id")]
-            
-#             # Create clean patent object
-#             clean_p = {
-#                 "patent_id": p.get("patent_id"),
-#                 "patent_number": p.get("patent_number"),
-#                 "title": p.get("patent_title"),
-#                 "abstract": p.get("patent_abstract"),
-#                 "date": p.get("patent_date"),
-#                 "assignees": [a.get("assignee_organization") for a in p.get("assignees", []) if a.get("assignee_organization")],
-#                 "inventors": [f"{i.get('inventor_first_name')} {i.get('inventor_last_name')}" for i in p.get("inventors", [])],
-#                 "cpc_codes": cpc_codes[:5] # Limit to top 5 codes
-#             }
-#             processed_patents.append(clean_p)
-            
-#         return json.dumps({"patents": processed_patents, "count": len(processed_patents)}, indent=2)
+    return await asyncio.to_thread(patents_view_api_logic, keyword, max_results, from_date)
 
-#     except Exception as e:
-#         return json.dumps({"error": f"Unexpected error: {str(e)}"})
 
-"""
-CLEAN SERPER-BASED PATENT SEARCH FUNCTION
-Replace the patents_view_api_logic function with this one.
-"""
+@lru_cache(maxsize=256)
+def _serper_search_payload(search_query: str, num: int) -> str:
+    """Serialized Serper search body; only the query and result count vary."""
+    return dumps({
+        "q": search_query,
+        "num": num,
+        "gl": "us",  # Geographic location
+        "hl": "en"   # Language
+    })
+
+
+def _patent_cache_key(keyword: str, max_results: int = 25, from_date: Optional[str] = None):
+    return ((keyword or "").strip().lower(), max_results, from_date)
+
 
+@ttl_cache(maxsize=512, ttl=3600, key=_patent_cache_key, cache_if=lambda r: not is_error_payload(r))
 def patents_view_api_logic(
     keyword: str,
     max_results: int = 25,
@@ -352,20 +238,14 @@ def patents_view_api_logic(
 ) -> str:
     """
     Core logic for patent search using Serper API (more reliable than PatentsView).
+    Results are cached per (keyword, max_results, from_date) for an hour.
     """
     # Validate inputs
     if not keyword or not keyword.strip():
-        return json.dumps({"error": "Keyword is required and cannot be empty"})
+        return dumps({"error": "Keyword is required and cannot be empty"})
     
     max_results = min(max_results or 10, 20)  # Limit to reasonable number
 
-    # Get Serper API key
-    serper_api_key = os.getenv("SERPER_API_KEY")
-    if not serper_api_key:
-        return json.dumps({
-            "error": "Missing SERPER_API_KEY environment variable"
-        })
-
     # Construct patent-specific search query
     # Use Google Patents search operators for better results
     search_query = f"{keyword} patent"
@@ -375,32 +255,20 @@ def patents_view_api_logic(
         year = from_date.split("-")[0] if "-" in from_date else from_date
         search_query += f" after:{year}"
 
-    # Serper API endpoint
-    url = "https://google.serper.dev/search"
-    
-    # Request payload
-    payload = {
-        "q": search_query,
-        "num": max_results,
-        "gl": "us",  # Geographic location
-        "hl": "en"   # Language
-    }
-    
-    headers = {
-        "X-API-KEY": serper_api_key,
-        "Content-Type": "application/json"
-    }
+    # Request payload (pre-serialized)
+    payload = _serper_search_payload(search_query, max_results)
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        response.raise_for_status()
-        data = response.json()
+        response = serper_post(payload, timeout=30)
+        if response is None:
+            return MISSING_KEY_ERROR
+        data = loads(response.content)
         
         # Extract patent-related results
         organic_results = data.get("organic", [])
         
         if not organic_results:
-            return json.dumps({
+            return dumps({
                 "message": "No patent information found",
                 "patents": []
             })
@@ -409,21 +277,20 @@ def patents_view_api_logic(
         patents = []
         for result in organic_results:
             # Extract patent number from title or link if available
-            title = result.get("title", "")
+            title = result.get("title") or ""
             link = result.get("link", "")
-            snippet = result.get("snippet", "")
+            snippet = result.get("snippet") or ""
             
             # Try to extract patent number (e.g., US1234567, EP1234567)
             patent_number = None
-            import re
-            patent_match = re.search(r'(US|EP|WO|CN|JP)\s*(\d{6,})', title + " " + snippet)
+            patent_match = _PATENT_NUM_RE.search(title + " " + snippet)
             if patent_match:
                 patent_number = patent_match.group(0).replace(" ", "")
             
             # Extract assignee/company from snippet if mentioned
             assignees = []
             # Common patterns: "filed by", "assigned to", "owned by"
-            assignee_match = re.search(r'(?:filed by|assigned to|owned by)\s+([A-Z][A-Za-z\s&,\.]+?)(?:\.|,|\s-)', snippet)
+            assignee_match = _ASSIGNEE_RE.search(snippet)
             if assignee_match:
                 assignees.append(assignee_match.group(1).strip())
             
@@ -431,21 +298,21 @@ def patents_view_api_logic(
                 "title": title,
                 "patent_number": patent_number,
                 "link": link,
-                "snippet": snippet[:200] + "..." if len(snippet) > 200 else snippet,
+                "snippet": (snippet[:200] + "...") if len(snippet) > 200 else snippet,
                 "assignees": assignees
             }
             patents.append(patent_info)
         
-        return json.dumps({
+        return dumps({
             "patents": patents,
             "total_found": len(patents),
             "search_query": search_query
-        }, indent=2)
+        })
         
     except requests.exceptions.RequestException as e:
-        return json.dumps({"error": f"Patent search failed: {str(e)}"})
+        return dumps({"error": f"Patent search failed: {str(e)}"})
     except Exception as e:
-        return json.dumps({"error": f"Unexpected error: {str(e)}"})
+        return dumps({"error": f"Unexpected error: {str(e)}"})
 
 patent_research_agent = Agent(
     name="patent_landscape_agent",
@@ -0,0 +1,22 @@
+"""
+Agent instruction prompts, kept as Markdown files next to this module so they
+can be edited without touching code.
+"""
+from functools import cache
+from pathlib import Path
+
+PROMPTS_DIR = Path(__file__).resolve().parent
+
+
+@cache
+def load_prompt(name: str) -> str:
+    """
+    Read a prompt file once and reuse it for the life of the process.
+
+    Args:
+        name: File name without the .md extension (e.g. "clinical_trials")
+
+    Returns:
+        The prompt text exactly as stored
+    """
+    return (PROMPTS_DIR / f"{name}.md").read_text(encoding="utf-8")
@@ -2,6 +2,19 @@ import requests
 from typing import List, Dict, Any
 from urllib.parse import quote
 
+from .http_client import SESSION
+from .json_utils import loads
+from .cache import ttl_cache
+
+# BindingDB affinities change rarely; empty/failed lookups are not cached
+BINDINGDB_CACHE_TTL = 24 * 3600
+
+
+def _targets_cache_key(smiles: str, similarity_cutoff: float = 0.85, affinity_cutoff: float = 10.0):
+    return ((smiles or "").strip(), similarity_cutoff, affinity_cutoff)
+
+
+@ttl_cache(maxsize=1024, ttl=BINDINGDB_CACHE_TTL, key=_targets_cache_key, cache_if=bool)
 def bindingdb_get_targets(
     smiles: str, 
     similarity_cutoff: float = 0.85,
@@ -21,7 +34,8 @@ def bindingdb_get_targets(
                         Only targets with affinity <= this value are returned.
     
     Returns:
-        List of dicts containing targets and affinity values
+        List of dicts containing targets and affinity values. Results are cached
+        per (SMILES, cutoffs); treat the returned list as read-only.
         
     Example:
         >>> targets = bindingdb_get_targets("CCO", similarity_cutoff=0.9, affinity_cutoff=5.0)
@@ -44,24 +58,24 @@ def bindingdb_get_targets(
     try:
         print(f"[BindingDB] Querying with SMILES: {smiles[:50]}... (similarity cutoff: {similarity_cutoff})")
         
-        resp = requests.get(url, params=params, timeout=30)
+        resp = SESSION.get(url, params=params, timeout=30)
         
         if resp.status_code != 200:
             print(f"[BindingDB] Request failed: HTTP {resp.status_code}")
-            if resp.text:
-                print(f"[BindingDB] Response: {resp.text[:200]}")
+            if resp.content:
+                print(f"[BindingDB] Response: {resp.content[:200].decode('utf-8', errors='replace')}")
             return targets
 
         # Handle empty response (no matching compounds)
-        if not resp.text or resp.text.strip() == "":
+        if not resp.content.strip():
             print(f"[BindingDB] No matching compounds found for given SMILES")
             return targets
 
         try:
-            data = resp.json()
+            data = loads(resp.content)
         except ValueError as e:
             print(f"[BindingDB] Invalid JSON response: {e}")
-            print(f"[BindingDB] Response text: {resp.text[:200]}")
+            print(f"[BindingDB] Response text: {resp.content[:200].decode('utf-8', errors='replace')}")
             return targets
 
         # The actual response structure is wrapped in "getTargetByCompoundResponse"
@@ -0,0 +1,97 @@
+"""
+In-process result caching for the data-fetch tools.
+
+External APIs (ClinicalTrials.gov, Serper, ChEMBL, ...) return effectively
+static data over the lifetime of a pipeline run, so identical calls are
+served from memory instead of repeating the HTTP round trip. Concurrent
+identical calls are coalesced: one thread fetches, the others wait for it.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def ttl_cache(
+    maxsize: int = 256,
+    ttl: float = 3600.0,
+    key: Optional[Callable[..., Hashable]] = None,
+    cache_if: Optional[Callable[[Any], bool]] = None
+):
+    """
+    Memoize a function with LRU eviction and a per-entry time-to-live.
+
+    Args:
+        maxsize: Maximum number of cached entries
+        ttl: Seconds an entry stays valid
+        key: Builds the cache key from the call arguments. Defaults to the
+             positional args plus sorted keyword args.
+        cache_if: Predicate on the result; results it rejects (e.g. error
+                  payloads) are returned but not stored.
+
+    Concurrent misses on the same key share a single call (single-flight);
+    if that call raises, each waiter retries on its own.
+
+    The wrapped function gains `cache_info()` and `cache_clear()`.
+    """
+    def decorator(func):
+        entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        lock = threading.Lock()
+        inflight: Dict[Hashable, list] = {}  # key -> [Event, result, ok]
+        stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+
+            with lock:
+                entry = entries.get(cache_key)
+                if entry is not None and entry[0] > now:
+                    entries.move_to_end(cache_key)
+                    stats["hits"] += 1
+                    return entry[1]
+                flight = inflight.get(cache_key)
+                if flight is None:
+                    flight = inflight[cache_key] = [threading.Event(), None, False]
+                    leader = True
+                    stats["misses"] += 1
+                else:
+                    leader = False
+                    stats["coalesced"] += 1
+
+            if not leader:
+                flight[0].wait()
+                if flight[2]:
+                    return flight[1]
+                return func(*args, **kwargs)
+
+            try:
+                result = func(*args, **kwargs)
+                flight[1], flight[2] = result, True
+            finally:
+                with lock:
+                    inflight.pop(cache_key, None)
+                    if flight[2] and (cache_if is None or cache_if(result)):
+                        entries[cache_key] = (now + ttl, result)
+                        entries.move_to_end(cache_key)
+                        while len(entries) > maxsize:
+                            entries.popitem(last=False)
+                flight[0].set()
+            return result
+
+        def cache_info() -> Dict[str, int]:
+            with lock:
+                return {**stats, "size": len(entries)}
+
+        def cache_clear() -> None:
+            with lock:
+                entries.clear()
+                stats["hits"] = stats["misses"] = stats["coalesced"] = 0
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
@@ -1,9 +1,22 @@
-import requests
 import urllib.parse
+from functools import lru_cache
 from typing import Optional, List, Dict, Any
 
+from .http_client import SESSION
+from .json_utils import loads
+from .cache import ttl_cache
+from .io_pool import IO_POOL
+
 BASE_URL = "https://www.ebi.ac.uk/chembl/api/data"
 
+# ChEMBL data only changes between releases; empty/failed lookups are not cached
+CHEMBL_CACHE_TTL = 24 * 3600
+
+# Synonym-match bonus by synonym type (unlisted types score 10); INN/USAN names win
+_SYN_TYPE_SCORES = {"INN": 100, "USAN": 100, "BAN": 50, "TRADE_NAME": 25, "ATC": 25}
+_PREFERRED_SYN_TYPES = frozenset({"INN", "USAN", "BAN"})
+
+@ttl_cache(maxsize=512, ttl=CHEMBL_CACHE_TTL, key=lambda drug_name: drug_name.strip().lower(), cache_if=bool)
 def chembl_search_molecule(drug_name: str) -> Optional[dict]:
     """
     Look up a molecule by name to retrieve:
@@ -21,9 +34,9 @@ def chembl_search_molecule(drug_name: str) -> Optional[dict]:
         url = f"{BASE_URL}/molecule.json"
         params = {"pref_name__iexact": drug_name_clean, "limit": 1}
         
-        resp = requests.get(url, params=params, timeout=20)
+        resp = SESSION.get(url, params=params, timeout=20)
         resp.raise_for_status()
-        data = resp.json()
+        data = loads(resp.content)
         
         molecules = data.get("molecules", [])
         if molecules:
@@ -37,15 +50,38 @@ def chembl_search_molecule(drug_name: str) -> Optional[dict]:
     except Exception as e:
         print(f"[ChEMBL] Exact name search error: {e}")
     
-    # Strategy 2: Use full-text search endpoint
+    # Strategy 2: Exact synonym match, filtered server-side
+    # https://www.ebi.ac.uk/chembl/api/data/molecule?molecule_synonyms__molecule_synonym__iexact=glucophage
+    try:
+        url = f"{BASE_URL}/molecule.json"
+        params = {"molecule_synonyms__molecule_synonym__iexact": drug_name_clean, "limit": 5}
+        
+        resp = SESSION.get(url, params=params, timeout=20)
+        resp.raise_for_status()
+        data = loads(resp.content)
+        
+        molecules = data.get("molecules", [])
+        if molecules:
+            # Every hit carries the synonym; prefer the most advanced compound
+            mol = max(molecules, key=lambda m: float(m.get("max_phase") or 0))
+            print(f"[ChEMBL] Found exact synonym match: {mol.get('pref_name') or drug_name_clean}")
+            return {
+                "chembl_id": mol["molecule_chembl_id"],
+                "smiles": mol.get("molecule_structures", {}).get("canonical_smiles"),
+                "name": mol.get("pref_name") or drug_name_clean
+            }
+    except Exception as e:
+        print(f"[ChEMBL] Synonym filter search error: {e}")
+    
+    # Strategy 3: Use full-text search endpoint
     # https://www.ebi.ac.uk/chembl/api/data/molecule/search.json?q=metformin
     try:
         url = f"{BASE_URL}/molecule/search.json"
         params = {"q": drug_name_clean, "limit": 20}
         
-        resp = requests.get(url, params=params, timeout=20)
+        resp = SESSION.get(url, params=params, timeout=20)
         resp.raise_for_status()
-        data = resp.json()
+        data = loads(resp.content)
         
         molecules = data.get("molecules", [])
         if molecules:
@@ -77,15 +113,7 @@ def chembl_search_molecule(drug_name: str) -> Optional[dict]:
                     
                     if syn_value.lower() == drug_name_lower:
                         # Score: prioritize INN/USAN and approved drugs
-                        score = max_phase * 10
-                        if syn_type in ["INN", "USAN"]:
-                            score += 100
-                        elif syn_type == "BAN":
-                            score += 50
-                        elif syn_type in ["TRADE_NAME", "ATC"]:
-                            score += 25
-                        else:
-                            score += 10
+                        score = max_phase * 10 + _SYN_TYPE_SCORES.get(syn_type, 10)
                         
                         if score > best_score:
                             best_score = score
@@ -110,7 +138,7 @@ def chembl_search_molecule(drug_name: str) -> Optional[dict]:
                 if not name:
                     synonyms = mol.get("molecule_synonyms", [])
                     for syn in synonyms:
-                        if syn.get("syn_type") in ["INN", "USAN", "BAN"]:
+                        if syn.get("syn_type") in _PREFERRED_SYN_TYPES:
                             name = syn.get("molecule_synonym")
                             break
                     if not name and synonyms:
@@ -130,13 +158,16 @@ def chembl_search_molecule(drug_name: str) -> Optional[dict]:
     return None
 
 
+@ttl_cache(maxsize=512, ttl=CHEMBL_CACHE_TTL, cache_if=bool)
 def chembl_get_molecule(chembl_id: str) -> Optional[Dict[str, Any]]:
     """Fetch molecule metadata by ID."""
     url = f"{BASE_URL}/molecule/{chembl_id}.json"
+    # Only the two fields read below, instead of the full molecule record
+    params = {"only": "molecule_structures,pref_name"}
     try:
-        resp = requests.get(url, timeout=20)
+        resp = SESSION.get(url, params=params, timeout=20)
         resp.raise_for_status()
-        mol = resp.json()
+        mol = loads(resp.content)
         return {
             "chembl_id": chembl_id,
             "smiles": mol.get("molecule_structures", {}).get("canonical_smiles"),
@@ -147,6 +178,28 @@ def chembl_get_molecule(chembl_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def _format_mechanism(m: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "action_type": m.get("action_type"),
+        "mechanism": m.get("mechanism_of_action"),
+        "target_chembl_id": m.get("target_chembl_id"),
+        "target_name": m.get("target_name")
+    }
+
+
+def _indication_name(ind: Dict[str, Any]) -> Optional[str]:
+    return ind.get("mesh_heading") or ind.get("efo_term")
+
+
+def _format_warning(w: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "warning_type": w.get("warning_type"),
+        "warning_class": w.get("warning_class"),
+        "warning_description": w.get("warning_description")
+    }
+
+
+@ttl_cache(maxsize=512, ttl=CHEMBL_CACHE_TTL, cache_if=bool)
 def chembl_mechanisms(chembl_id: str) -> List[Dict[str, Any]]:
     """
     Fetch mechanism of action data.
@@ -160,23 +213,16 @@ def chembl_mechanisms(chembl_id: str) -> List[Dict[str, Any]]:
     url = f"{BASE_URL}/mechanism.json"
     params = {"molecule_chembl_id": chembl_id, "limit": 50}
     try:
-        resp = requests.get(url, params=params, timeout=20)
+        resp = SESSION.get(url, params=params, timeout=20)
         resp.raise_for_status()
-        data = resp.json()
-        return [
-            {
-                "action_type": m.get("action_type"),
-                "mechanism": m.get("mechanism_of_action"),
-                "target_chembl_id": m.get("target_chembl_id"),
-                "target_name": m.get("target_name")
-            }
-            for m in data.get("mechanisms", [])
-        ]
+        data = loads(resp.content)
+        return [_format_mechanism(m) for m in data.get("mechanisms", [])]
     except Exception as e:
         print(f"[ChEMBL] MoA fetch error for {chembl_id}: {e}")
         return []
 
 
+@ttl_cache(maxsize=512, ttl=CHEMBL_CACHE_TTL, cache_if=bool)
 def chembl_drug_indications(chembl_id: str) -> List[str]:
     """
     Fetch known therapeutic indications.
@@ -191,19 +237,20 @@ def chembl_drug_indications(chembl_id: str) -> List[str]:
     params = {"molecule_chembl_id": chembl_id, "limit": 50}
 
     try:
-        resp = requests.get(url, params=params, timeout=20)
+        resp = SESSION.get(url, params=params, timeout=20)
         resp.raise_for_status()
-        data = resp.json()
+        data = loads(resp.content)
         return [
-            ind.get("mesh_heading") or ind.get("efo_term")
+            _indication_name(ind)
             for ind in data.get("drug_indications", [])
-            if ind.get("mesh_heading") or ind.get("efo_term")
+            if _indication_name(ind)
         ]
     except Exception as e:
         print(f"[ChEMBL] Indication fetch error for {chembl_id}: {e}")
         return []
 
 
+@ttl_cache(maxsize=512, ttl=CHEMBL_CACHE_TTL, cache_if=bool)
 def chembl_drug_warnings(chembl_id: str) -> List[Dict[str, Any]]:
     """
     Fetch safety warnings.
@@ -217,34 +264,98 @@ def chembl_drug_warnings(chembl_id: str) -> List[Dict[str, Any]]:
     url = f"{BASE_URL}/drug_warning.json"
     params = {"molecule_chembl_id": chembl_id, "limit": 50}
     try:
-        resp = requests.get(url, params=params, timeout=20)
+        resp = SESSION.get(url, params=params, timeout=20)
         resp.raise_for_status()
-        data = resp.json()
-        return [
-            {
-                "warning_type": w.get("warning_type"),
-                "warning_class": w.get("warning_class"),
-                "warning_description": w.get("warning_description")
-            }
-            for w in data.get("drug_warnings", [])
-        ]
+        data = loads(resp.content)
+        return [_format_warning(w) for w in data.get("drug_warnings", [])]
     except Exception as e:
         print(f"[ChEMBL] Safety warning fetch error for {chembl_id}: {e}")
         return []
 
 
+def _chembl_fetch_all(resource: str, params: Dict[str, Any], collection: str) -> List[Dict[str, Any]]:
+    """Fetch every page of a ChEMBL list endpoint, following page_meta.next."""
+    url = f"{BASE_URL}/{resource}.json"
+    params = {**params, "limit": 1000}
+    items = []
+    while url:
+        resp = SESSION.get(url, params=params, timeout=20)
+        resp.raise_for_status()
+        data = loads(resp.content)
+        items.extend(data.get(collection, []))
+        next_path = (data.get("page_meta") or {}).get("next")
+        # next is a server-relative path that already carries the query string
+        url = f"https://www.ebi.ac.uk{next_path}" if next_path else None
+        params = None
+    return items
+
+
+def chembl_bulk_profiles(chembl_ids: List[str], per_molecule_limit: int = 50) -> Optional[Dict[str, Dict[str, list]]]:
+    """
+    Fetch mechanisms, indications and safety warnings for many molecules at once.
+    
+    Uses `molecule_chembl_id__in` filters, so each resource costs one request
+    (plus paging) regardless of how many molecules are asked for.
+    
+    Args:
+        chembl_ids: ChEMBL molecule IDs
+        per_molecule_limit: Max records kept per molecule and resource, matching
+                            the limit used by the single-molecule helpers
+        
+    Returns:
+        Dict of chembl_id -> {"moa": [...], "indications": [...], "warnings": [...]},
+        with an entry for every requested ID, or None if any request failed.
+    """
+    if not chembl_ids:
+        return {}
+    
+    id_filter = {"molecule_chembl_id__in": ",".join(chembl_ids)}
+    profiles = {cid: {"moa": [], "indications": [], "warnings": []} for cid in chembl_ids}
+    
+    try:
+        mechanisms = IO_POOL.submit(_chembl_fetch_all, "mechanism", id_filter, "mechanisms")
+        indications = IO_POOL.submit(_chembl_fetch_all, "drug_indication", id_filter, "drug_indications")
+        warnings = IO_POOL.submit(_chembl_fetch_all, "drug_warning", id_filter, "drug_warnings")
+        mechanisms, indications, warnings = mechanisms.result(), indications.result(), warnings.result()
+    except Exception as e:
+        print(f"[ChEMBL] Bulk profile fetch error: {e}")
+        return None
+    
+    for m in mechanisms:
+        entry = profiles.get(m.get("molecule_chembl_id"))
+        if entry is not None and len(entry["moa"]) < per_molecule_limit:
+            entry["moa"].append(_format_mechanism(m))
+    for ind in indications:
+        entry = profiles.get(ind.get("molecule_chembl_id"))
+        name = _indication_name(ind)
+        if entry is not None and name and len(entry["indications"]) < per_molecule_limit:
+            entry["indications"].append(name)
+    for w in warnings:
+        entry = profiles.get(w.get("molecule_chembl_id"))
+        if entry is not None and len(entry["warnings"]) < per_molecule_limit:
+            entry["warnings"].append(_format_warning(w))
+    
+    return profiles
+
+
+@lru_cache(maxsize=1024)
+def _quote_smiles(smiles: str) -> str:
+    """URL path segment for a SMILES string (memoized; the same structures recur across lookups)."""
+    return urllib.parse.quote(smiles, safe="")
+
+
+@ttl_cache(maxsize=512, ttl=CHEMBL_CACHE_TTL, cache_if=bool)
 def chembl_similarity(smiles: str, threshold: int = 70) -> List[Dict[str, Any]]:
     """Fetch similar drugs from SMILES."""
     if not smiles:
         return []
 
-    s = urllib.parse.quote(smiles, safe="")
-    url = f"{BASE_URL}/similarity/{s}/{threshold}.json"
+    url = f"{BASE_URL}/similarity/{_quote_smiles(smiles)}/{threshold}.json"
 
     try:
-        resp = requests.get(url, timeout=20)
+        resp = SESSION.get(url, timeout=20)
         resp.raise_for_status()
-        data = resp.json()
+        data = loads(resp.content)
         return [
             {
                 "chembl_id": m.get("molecule_chembl_id"),
@@ -258,6 +369,7 @@ def chembl_similarity(smiles: str, threshold: int = 70) -> List[Dict[str, Any]]:
         return []
 
 
+@ttl_cache(maxsize=512, ttl=CHEMBL_CACHE_TTL, cache_if=bool)
 def chembl_drugs_for_target(target_chembl_id: str) -> List[Dict[str, Any]]:
     """
     Find drugs that modulate a specific target via mechanism endpoint.
@@ -272,9 +384,9 @@ def chembl_drugs_for_target(target_chembl_id: str) -> List[Dict[str, Any]]:
     params = {"target_chembl_id": target_chembl_id, "limit": 50}
     
     try:
-        resp = requests.get(url, params=params, timeout=20)
+        resp = SESSION.get(url, params=params, timeout=20)
         resp.raise_for_status()
-        data = resp.json()
+        data = loads(resp.content)
         
         drugs = []
         seen = set()
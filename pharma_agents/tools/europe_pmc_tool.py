@@ -0,0 +1,53 @@
+import requests
+
+from .http_client import SESSION
+from .json_utils import loads
+from .cache import ttl_cache
+
+SEARCH_URL = "https://www.ebi.ac.uk/europepmc/webservices/rest/search"
+EUROPE_PMC_TIMEOUT_S = 30
+
+# Hit counts drift slowly; zero/failed lookups are not cached
+EUROPE_PMC_CACHE_TTL = 24 * 3600
+
+
+def europe_pmc_search(query: str, page_size: int = 25, synonym: bool = False) -> requests.Response:
+    """
+    Fetch one page of Europe PMC lite search results as JSON.
+
+    Args:
+        query: Europe PMC query string
+        page_size: Results per page
+        synonym: Also match MeSH synonyms of the query terms
+
+    Returns:
+        The successful response; HTTP and transport errors are raised
+    """
+    params = {
+        "query": query,
+        "resultType": "lite",
+        "format": "json",
+        "pageSize": page_size,
+    }
+    if synonym:
+        params["synonym"] = "true"
+    resp = SESSION.get(SEARCH_URL, params=params, timeout=EUROPE_PMC_TIMEOUT_S)
+    resp.raise_for_status()
+    return resp
+
+
+@ttl_cache(maxsize=1024, ttl=EUROPE_PMC_CACHE_TTL, key=lambda query: query.strip().lower(), cache_if=bool)
+def europe_pmc_count(query: str) -> int:
+    """
+    Count Europe PMC publications matching a query.
+
+    Only the hit count is read, so a single result is requested.
+
+    Returns:
+        The number of matching publications, or 0 if the lookup failed
+    """
+    try:
+        return int(loads(europe_pmc_search(query, page_size=1).content).get("hitCount", 0))
+    except Exception as e:
+        print(f"[Europe PMC] Count lookup error: {e}")
+        return 0
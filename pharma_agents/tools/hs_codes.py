@@ -0,0 +1,60 @@
+"""
+HS code -> pharmaceutical trade category lookup.
+
+Covers the Harmonized System headings relevant to drug trade (chapter 29
+organic APIs/intermediates and chapter 30 pharmaceutical products) so the
+EXIM agent gets a deterministic category instead of reasoning one out.
+"""
+import re
+from typing import Optional
+
+# Keys are 2/4/6-digit HS prefixes; the longest matching prefix wins
+HS_PHARMA_CATEGORIES = {
+    "29": "Organic chemicals (APIs and intermediates)",
+    "2936": "Provitamins and vitamins (API)",
+    "2937": "Hormones, prostaglandins and steroids (API)",
+    "293712": "Insulin and its salts (API)",
+    "2938": "Glycosides (API)",
+    "2939": "Alkaloids (API)",
+    "2941": "Antibiotics (API)",
+    "294110": "Penicillins (API)",
+    "2942": "Other organic compounds (API)",
+    "30": "Pharmaceutical products",
+    "3001": "Glands and organ extracts for therapeutic use",
+    "3002": "Biologics: blood fractions, immunological products, vaccines",
+    "300215": "Immunological products in measured doses (biologic formulation)",
+    "300241": "Vaccines for human medicine (biologic)",
+    "3003": "Medicaments not in measured doses (bulk formulation)",
+    "3004": "Medicaments in measured doses (finished formulation)",
+    "300410": "Formulations containing penicillins or streptomycins",
+    "300420": "Formulations containing other antibiotics",
+    "300431": "Formulations containing insulin",
+    "300432": "Formulations containing corticosteroid hormones",
+    "300439": "Formulations containing other hormones",
+    "300450": "Formulations containing vitamins",
+    "300460": "Formulations containing antimalarials",
+    "300490": "Other medicaments in measured doses (finished formulation)",
+    "3005": "Dressings and bandages (medical consumables)",
+    "3006": "Other pharmaceutical goods (sutures, diagnostics, kits)",
+}
+
+_NON_DIGITS_RE = re.compile(r"\D")
+
+
+def hs_category_lookup(hs_code: str) -> Optional[dict]:
+    """
+    Map an HS code to its pharmaceutical trade category by longest prefix.
+
+    Args:
+        hs_code: HS code in any common notation (e.g. "3004", "3004.90", "300490")
+
+    Returns:
+        {"hs_code", "matched_prefix", "category"}, or None when the code is
+        outside the pharma-relevant chapters
+    """
+    digits = _NON_DIGITS_RE.sub("", hs_code or "")[:6]
+    for length in (6, 4, 2):
+        prefix = digits[:length]
+        if len(prefix) == length and prefix in HS_PHARMA_CATEGORIES:
+            return {"hs_code": digits, "matched_prefix": prefix, "category": HS_PHARMA_CATEGORIES[prefix]}
+    return None
@@ -0,0 +1,31 @@
+"""
+Shared HTTP session for the data-fetch tools.
+
+A single pooled `requests.Session` keeps TCP/TLS connections alive between
+calls to the same host (ClinicalTrials.gov, Serper, BindingDB, ...), and
+retries rate-limit and transient server errors with a short backoff.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = "pharma-researcher/1.0"
+
+# Transport-level retries, so transient failures never reach the LLM as tool errors.
+# Only GET/HEAD are retried here; POST searches surface their error to the caller.
+_retry = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=frozenset({"GET", "HEAD"}),
+    respect_retry_after_header=True,
+)
+_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=_retry)
+
+SESSION = requests.Session()
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+SESSION.headers.update({
+    "User-Agent": USER_AGENT,
+    "Accept": "application/json",
+})
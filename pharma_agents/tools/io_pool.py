@@ -0,0 +1,16 @@
+"""
+Process-wide thread pool for blocking HTTP fan-out.
+
+Leaf fetches (page prefetch, parallel ChEMBL/trials requests) share this pool
+instead of creating an executor per call, which also caps how many requests
+the tools have in flight at once. Only submit work that does not itself wait
+on IO_POOL, so the pool cannot deadlock on nested submissions.
+"""
+import atexit
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+IO_POOL_SIZE = int(os.getenv("PHARMA_IO_POOL", "32"))
+
+IO_POOL = ThreadPoolExecutor(max_workers=IO_POOL_SIZE, thread_name_prefix="pharma-io")
+atexit.register(IO_POOL.shutdown, wait=False)
@@ -0,0 +1,42 @@
+"""
+JSON encode/decode helpers shared by the agent tools.
+
+Uses orjson when it is installed and falls back to the stdlib json module,
+so tool outputs stay plain `str` either way.
+"""
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+    import json
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """
+    Serialize obj to a JSON string.
+
+    Args:
+        obj: JSON-serializable object; unknown types (e.g. Decimal) fall back to str()
+        indent: Pretty-print with a 2-space indent
+
+    Returns:
+        JSON text
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=str, option=option).decode("utf-8")
+    return json.dumps(obj, indent=2 if indent else None, default=str)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON from raw response bytes (e.g. `response.content`) or text."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def is_error_payload(text: str) -> bool:
+    """True if a tool's JSON string output is an `{"error": ...}` payload."""
+    return text.startswith('{"error"')
@@ -1,7 +1,9 @@
-import requests
 import traceback
 from typing import List, Optional
 
+from .http_client import SESSION
+from .json_utils import loads
+
 def open_targets_disease_lookup(
     disease_name: str, 
     limit: int = 10,
@@ -35,7 +37,7 @@ def open_targets_disease_lookup(
     """
 
     try:
-        resp = requests.post(
+        resp = SESSION.post(
             url,
             json={"query": disease_search_query, "variables": {"queryString": disease_name}},
             timeout=20
@@ -44,7 +46,7 @@ def open_targets_disease_lookup(
             print(f"[Open Targets] Search HTTP failed: {resp.status_code}")
             return []
 
-        data = resp.json()
+        data = loads(resp.content)
 
         # GraphQL layer error
         if "errors" in data:
@@ -75,7 +77,7 @@ def open_targets_disease_lookup(
         }
         """
 
-        resp = requests.post(
+        resp = SESSION.post(
             url,
             json={"query": disease_targets_query, "variables": {"efoId": efo_id, "size": limit}},
             timeout=20
@@ -85,7 +87,7 @@ def open_targets_disease_lookup(
             print(f"[Open Targets] Target fetch HTTP failed: {resp.status_code}")
             return []
 
-        data = resp.json()
+        data = loads(resp.content)
         if "errors" in data:
             print(f"[Open Targets] GraphQL returned errors: {data['errors']}")
             return []
@@ -122,4 +124,5 @@ def open_targets_disease_lookup(
         return []
 
 
-open_targets_disease_lookup("Diabetes")
\ No newline at end of file
+if __name__ == "__main__":
+    open_targets_disease_lookup("Diabetes")
@@ -0,0 +1,96 @@
+"""
+Serper (Google Search API) client shared by the web-search-backed tools.
+
+Every trade/market/patent search posts a JSON body with the same headers;
+this module is the one place that does it, over the pooled session.
+"""
+import os
+from functools import lru_cache
+from typing import Any, List, Optional
+
+import requests
+
+from .http_client import SESSION
+from .json_utils import dumps, loads
+
+SERPER_SEARCH_URL = "https://google.serper.dev/search"
+SERPER_PATENTS_URL = "https://google.serper.dev/patents"
+SERPER_TIMEOUT_S = 15.0
+
+MISSING_KEY_ERROR = dumps({"error": "Missing SERPER_API_KEY environment variable."})
+
+
+@lru_cache(maxsize=4)
+def _headers_for(api_key: str) -> dict:
+    return {"X-API-KEY": api_key, "Content-Type": "application/json"}
+
+
+def _serper_headers() -> Optional[dict]:
+    """Request headers for the configured API key (built once per key), or None if unset."""
+    api_key = os.environ.get("SERPER_API_KEY")
+    return _headers_for(api_key) if api_key else None
+
+
+def serper_post(payload: str, url: str = SERPER_SEARCH_URL, timeout: float = SERPER_TIMEOUT_S) -> Optional[requests.Response]:
+    """
+    POST a pre-serialized request body to a Serper endpoint.
+
+    Args:
+        payload: JSON request body
+        url: Serper endpoint (web search by default)
+        timeout: Request timeout in seconds
+
+    Returns:
+        The successful response, or None if no API key is configured.
+        HTTP and transport errors are raised to the caller.
+    """
+    headers = _serper_headers()
+    if headers is None:
+        return None
+    response = SESSION.post(url, headers=headers, data=payload, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+def serper_search(query: str, timeout: float = SERPER_TIMEOUT_S) -> str:
+    """
+    Run one Serper web search.
+
+    Args:
+        query: The search query string
+        timeout: Request timeout in seconds
+
+    Returns:
+        The raw JSON response text, or an `{"error": ...}` JSON string
+    """
+    try:
+        response = serper_post(dumps({"q": query}), timeout=timeout)
+        if response is None:
+            return MISSING_KEY_ERROR
+        return response.text
+    except Exception as e:
+        return dumps({"error": f"Search failed: {str(e)}"})
+
+
+def serper_search_batch(queries: List[str], timeout: float = SERPER_TIMEOUT_S) -> Optional[List[Any]]:
+    """
+    Send several searches in one Serper request (the API accepts a JSON array
+    of query objects and answers with an array in the same order).
+
+    Returns:
+        One parsed result per query, or None if the batch call failed or
+        came back in an unexpected shape
+    """
+    if not queries:
+        return []
+    try:
+        response = serper_post(dumps([{"q": q} for q in queries]), timeout=timeout)
+        if response is None:
+            return [loads(MISSING_KEY_ERROR) for _ in queries]
+        data = loads(response.content)
+    except Exception as e:
+        print(f"[Serper] Batch search failed: {e}")
+        return None
+    if not isinstance(data, list) or len(data) != len(queries):
+        return None
+    return data
@@ -0,0 +1,60 @@
+"""
+Per-agent-run cap on external search tool calls.
+
+The agent prompts ask for at most a few tool calls per query, but nothing
+enforced it; a looping agent could keep hitting Serper until max_turns. The
+orchestrator opens a budget at the start of each agent run (a ContextVar, so
+concurrent agents each get their own), and `budgeted` tools refuse further
+calls once it is spent.
+"""
+import inspect
+import threading
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from .json_utils import dumps
+
+BUDGET_EXHAUSTED = dumps({"error": "Tool-call budget for this query is exhausted; summarize with the data already gathered."})
+
+# [calls_left] for the current agent run; None means unlimited (e.g. direct logic calls)
+_budget: ContextVar[Optional[list]] = ContextVar("tool_call_budget", default=None)
+_lock = threading.Lock()
+
+
+def start_tool_budget(limit: int) -> None:
+    """Allow `limit` budgeted tool calls for the agent run in the current context."""
+    _budget.set([limit])
+
+
+def take_budget(n: int) -> int:
+    """Spend up to `n` calls from the current budget; returns how many were granted."""
+    budget = _budget.get()
+    if budget is None:
+        return n
+    with _lock:
+        granted = max(0, min(n, budget[0]))
+        budget[0] -= granted
+        return granted
+
+
+def _take() -> bool:
+    return take_budget(1) == 1
+
+
+def budgeted(func):
+    """Make a tool (sync or async) spend one call from the current budget, or refuse when none is left."""
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not _take():
+                return BUDGET_EXHAUSTED
+            return await func(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _take():
+            return BUDGET_EXHAUSTED
+        return func(*args, **kwargs)
+    return wrapper
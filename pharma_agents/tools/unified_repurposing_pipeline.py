@@ -1,7 +1,8 @@
 from typing import Dict, Any, Tuple, Optional, List
 from agents import function_tool
-import json
+import heapq
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 # Import all required tool functions
 from .chembl_tools import (
@@ -11,10 +12,13 @@ from .chembl_tools import (
     chembl_drug_indications,
     chembl_drug_warnings,
     chembl_similarity,
-    chembl_drugs_for_target
+    chembl_drugs_for_target,
+    chembl_bulk_profiles
 )
 from .bindingdb_tool import bindingdb_get_targets
-# from .europe_pmc_tool import europe_pmc_count
+from .json_utils import loads
+from .io_pool import IO_POOL
+from .europe_pmc_tool import europe_pmc_count
 
 # Import missing agents/tools
 from ..clinical_trails_research_agent import clinical_trials_research_logic, ClinicalTrialsToolInput
@@ -22,6 +26,24 @@ from ..patent_research_agent import patents_view_api_logic
 from ..exim_trade_agent import serper_trade_tool_logic
 from ..market_insights_agent import market_insights_tool_logic
 
+# INN stems; str.endswith accepts a tuple and checks all of them in one call
+_DRUG_SUFFIXES = ("tide", "mide", "mab", "nib", "vir", "stat", "pril", "ine", "olol", "azole", "mycin", "cycline", "floxacin", "cillin")
+
+_KNOWN_DRUGS = frozenset({
+    "metformin", "aspirin", "ibuprofen", "paracetamol", "insulin",
+    "warfarin", "heparin", "morphine", "codeine", "penicillin",
+    "atorvastatin", "simvastatin", "omeprazole", "amoxicillin",
+    "lisinopril", "levothyroxine", "azithromycin", "metoprolol",
+    "amlodipine", "hydrochlorothiazide", "gabapentin", "sertraline",
+    "semaglutide", "thiazolidinedione", "thalidomide"
+})
+
+
+def _affinity_key(target: dict) -> float:
+    """Sort key for BindingDB hits: strongest binding (lowest µM) first."""
+    return target.get("affinity_value_uM", 999)
+
+
 def detect_input_type(query: str) -> Tuple[str, str]:
     """Detect input type and extract core name."""
     clean = query.strip()
@@ -38,39 +60,59 @@ def detect_input_type(query: str) -> Tuple[str, str]:
         "generate a drug repurposing analysis for "
     ]
     
+    clean_lower = clean.lower()
     for prefix in instruction_prefixes:
-        if clean.lower().startswith(prefix):
+        if clean_lower.startswith(prefix):
             clean = clean[len(prefix):].strip()
+            clean_lower = clean.lower()
             break
     
     # Remove everything after separator words
     separators = [" including ", ", and ", " with ", " for "]
     for sep in separators:
-        if sep in clean.lower():
-            idx = clean.lower().find(sep)
+        idx = clean_lower.find(sep)
+        if idx != -1:
             clean = clean[:idx].strip()
             break
     
     # Get first word for drug detection
     word = clean.split()[0].strip(",.:;!?")
     
-    drug_suffixes = ["tide", "mide", "mab", "nib", "vir", "stat", "pril", "ine", "olol", "azole", "mycin", "cycline", "floxacin", "cillin"]
-    
-    known_drugs = [
-        "metformin", "aspirin", "ibuprofen", "paracetamol", "insulin",
-        "warfarin", "heparin", "morphine", "codeine", "penicillin",
-        "atorvastatin", "simvastatin", "omeprazole", "amoxicillin",
-        "lisinopril", "levothyroxine", "azithromycin", "metoprolol",
-        "amlodipine", "hydrochlorothiazide", "gabapentin", "sertraline",
-        "semaglutide", "thiazolidinedione", "thalidomide"
-    ]
-
-    if word.lower() in known_drugs or any(word.lower().endswith(s) for s in drug_suffixes):
+    word_lower = word.lower()
+    if word_lower in _KNOWN_DRUGS or word_lower.endswith(_DRUG_SUFFIXES):
         return "drug", word
 
     return "disease", clean
 
 
+def _fetch_clinical_trials(drug: str):
+    """Step 7: Clinical trials where the drug is an intervention."""
+    ct_input = ClinicalTrialsToolInput(
+        intervention=drug,
+        status=["RECRUITING", "COMPLETED", "TERMINATED"],
+        page_size=5
+    )
+    ct_data = loads(clinical_trials_research_logic(ct_input))
+    if isinstance(ct_data, dict) and "studies" in ct_data:
+        return ct_data["studies"]
+    return ct_data
+
+
+def _fetch_patents(drug: str):
+    """Step 8: Patent landscape."""
+    return loads(patents_view_api_logic(keyword=drug, max_results=5))
+
+
+def _fetch_trade_data(drug: str):
+    """Step 9: EXIM trade (drug name used as HS code proxy for the search query)."""
+    return loads(serper_trade_tool_logic(hs_code=drug, year=2024))
+
+
+def _fetch_market_data(drug: str):
+    """Step 10: Market insights."""
+    return loads(market_insights_tool_logic(query=f"{drug} sales revenue"))
+
+
 def execute_drug_pipeline(drug: str) -> dict:
     """Drug enrichment pipeline."""
     print(f"\n[Pipeline A] Starting drug enrichment for: {drug}")
@@ -112,7 +154,7 @@ def execute_drug_pipeline(drug: str) -> dict:
             all_targets = bindingdb_get_targets(result["smiles"], similarity_cutoff=0.85, affinity_cutoff=10.0)
             print(f"[Pipeline A] ✓ Found {len(all_targets)} BindingDB targets")
             # Truncate to top 20 to avoid token limits
-            result["bindingdb_all_targets"] = sorted(all_targets, key=lambda x: x.get("affinity_value_uM", 999))[:20]
+            result["bindingdb_all_targets"] = heapq.nsmallest(20, all_targets, key=_affinity_key)
         except Exception as e:
             print(f"[Pipeline A] ⚠️ BindingDB failed: {e}")
 
@@ -148,60 +190,97 @@ def execute_drug_pipeline(drug: str) -> dict:
             print(f"[Pipeline A] ⚠️ Similarity failed: {e}")
 
     # --- NEW INTEGRATIONS ---
-    
-    # 7. Clinical Trials
-    print(f"[Pipeline A] Step 7: Fetching Clinical Trials...")
-    try:
-        ct_input = ClinicalTrialsToolInput(
-            intervention=drug,
-            status=["RECRUITING", "COMPLETED", "TERMINATED"],
-            page_size=5
-        )
-        ct_results_json = clinical_trials_research_logic(ct_input)
-        # Parse JSON string result
-        ct_data = json.loads(ct_results_json)
-        if isinstance(ct_data, list):
-             result["clinical_trials"] = ct_data
-        elif isinstance(ct_data, dict) and "studies" in ct_data:
-             result["clinical_trials"] = ct_data["studies"]
-        else:
-             result["clinical_trials"] = ct_data # Fallback
-        print(f"[Pipeline A] ✓ Clinical Trials fetched")
-    except Exception as e:
-        print(f"[Pipeline A] ⚠️ Clinical Trials failed: {e}")
-
-    # 8. Patents
-    print(f"[Pipeline A] Step 8: Fetching Patents...")
-    try:
-        patents_json = patents_view_api_logic(keyword=drug, max_results=5)
-        result["patents"] = json.loads(patents_json)
-        print(f"[Pipeline A] ✓ Patents fetched")
-    except Exception as e:
-        print(f"[Pipeline A] ⚠️ Patents failed: {e}")
-
-    # 9. EXIM Trade
-    print(f"[Pipeline A] Step 9: Fetching Trade Data...")
-    try:
-        # Use drug name as HS code proxy for search query
-        trade_json = serper_trade_tool_logic(hs_code=drug, year=2024) 
-        result["trade_data"] = json.loads(trade_json)
-        print(f"[Pipeline A] ✓ Trade Data fetched")
-    except Exception as e:
-        print(f"[Pipeline A] ⚠️ Trade Data failed: {e}")
-
-    # 10. Market Insights
-    print(f"[Pipeline A] Step 10: Fetching Market Insights...")
-    try:
-        market_json = market_insights_tool_logic(query=f"{drug} sales revenue")
-        result["market_data"] = json.loads(market_json)
-        print(f"[Pipeline A] ✓ Market Insights fetched")
-    except Exception as e:
-        print(f"[Pipeline A] ⚠️ Market Insights failed: {e}")
+    # Steps 7-10 are independent network calls, so they run concurrently
+    print(f"[Pipeline A] Steps 7-10: Fetching Clinical Trials, Patents, Trade Data and Market Insights...")
+    integrations = {
+        "clinical_trials": ("Clinical Trials", _fetch_clinical_trials),
+        "patents": ("Patents", _fetch_patents),
+        "trade_data": ("Trade Data", _fetch_trade_data),
+        "market_data": ("Market Insights", _fetch_market_data),
+    }
+    with ThreadPoolExecutor(max_workers=len(integrations)) as executor:
+        futures = {field: executor.submit(fetch, drug) for field, (_, fetch) in integrations.items()}
+        for field, future in futures.items():
+            label = integrations[field][0]
+            try:
+                result[field] = future.result()
+                print(f"[Pipeline A] ✓ {label} fetched")
+            except Exception as e:
+                print(f"[Pipeline A] ⚠️ {label} failed: {e}")
 
     print(f"[Pipeline A] ✅ Pipeline complete\n")
     return result
 
 
+def _enrich_candidate(info: dict, index: int, total: int, disease: str, profile: Optional[dict] = None) -> Optional[dict]:
+    """
+    Enrich and score one disease-pipeline drug candidate in place.
+
+    `profile` holds prefetched mechanisms/indications/warnings; without it
+    they are fetched per molecule.
+
+    Returns the candidate, or None if it could not be resolved in ChEMBL.
+    """
+    cid = info["chembl_id"]
+    print(f"[Pipeline B] Processing candidate {index}/{total}: {cid}")
+    
+    mol = chembl_get_molecule(cid)
+    if not mol:
+        return None
+
+    # ✅ FIX: Assign real drug name and SMILES
+    info["drug_name"] = mol["name"]
+    info["smiles"] = mol["smiles"]
+
+    if info["smiles"]:
+        # Get affinity data
+        targets = bindingdb_get_targets(info["smiles"], similarity_cutoff=0.9, affinity_cutoff=10.0)
+        # Keep top 5 affinities
+        info["affinity"] = heapq.nsmallest(5, targets, key=_affinity_key)
+
+    if profile is not None:
+        info["moa"] = profile["moa"]
+        info["indications"] = profile["indications"]
+        info["warnings"] = profile["warnings"]
+    else:
+        info["moa"] = chembl_mechanisms(cid)
+        info["indications"] = chembl_drug_indications(cid)
+        info["warnings"] = chembl_drug_warnings(cid)
+
+    # Literature support
+    lit_count = 0
+    if info.get("drug_name"):
+        lit_count = europe_pmc_count(f"{disease} AND {info['drug_name']}")
+        
+    # --- SCORING LOGIC ---
+    # 1. Target Score: Sum of association scores of hit targets
+    target_score_sum = sum(t["score"] for t in info["targets_hit"])
+    
+    # 2. Affinity Bonus: +1 for <1uM, +2 for <0.1uM (max 2 points)
+    affinity_bonus = 0
+    if info["affinity"]:
+        best_aff = min(t.get("affinity_value_uM", 999) for t in info["affinity"])
+        if best_aff < 0.1: affinity_bonus = 2.0
+        elif best_aff < 1.0: affinity_bonus = 1.0
+        
+    # 3. Literature Bonus: log-like scale (0-3 points)
+    # >0: +0.5, >10: +1.0, >50: +2.0, >100: +3.0
+    lit_bonus = 0
+    if lit_count > 100: lit_bonus = 3.0
+    elif lit_count > 50: lit_bonus = 2.0
+    elif lit_count > 10: lit_bonus = 1.0
+    elif lit_count > 0: lit_bonus = 0.5
+    
+    # 4. Safety Penalty: -1 per warning type
+    safety_penalty = len(info["warnings"]) * 1.0
+    
+    # Final Score
+    final_score = (target_score_sum * 5) + affinity_bonus + lit_bonus - safety_penalty
+    info["repurposing_score"] = round(final_score, 2)
+    info["literature_count"] = lit_count
+    return info
+
+
 def execute_disease_pipeline(disease: str) -> dict:
     """Disease enrichment pipeline."""
     result = {
@@ -229,14 +308,15 @@ def execute_disease_pipeline(disease: str) -> dict:
     # ✅ FIX: Build enriched drug map with real names, not None
     drug_map = {}
     # Limit to top 5 targets to keep runtime reasonable
-    for t in result["disease_targets"][:5]:
-        tid = t["target_id"]
+    top_targets = result["disease_targets"][:5]
+    
+    # Target -> drug lookups are independent, so fetch them concurrently
+    drug_lists = list(IO_POOL.map(lambda t: chembl_drugs_for_target(t["target_id"]) or [], top_targets))
+    
+    for t, drugs in zip(top_targets, drug_lists):
         symbol = t["symbol"]
         t_score = t.get("score", 0.0)
         
-        # Get drugs for this target
-        drugs = chembl_drugs_for_target(tid) or []
-        
         # OPTIMIZATION: Limit to top 4 drugs per target to avoid API timeouts
         # (5 targets * 4 drugs = 20 drugs max to enrich)
         for d in drugs[:4]:
@@ -260,63 +340,34 @@ def execute_disease_pipeline(disease: str) -> dict:
 
     print(f"[Pipeline B] Enriching {len(drug_map)} unique drug candidates...")
     
-    for i, (cid, info) in enumerate(drug_map.values(), 1):
-        print(f"[Pipeline B] Processing candidate {i}/{len(drug_map)}: {cid}")
-        
-        mol = chembl_get_molecule(cid)
-        if not mol:
-            continue
-
-        # ✅ FIX: Assign real drug name and SMILES
-        info["drug_name"] = mol["name"]
-        info["smiles"] = mol["smiles"]
-
-        if info["smiles"]:
-            # Get affinity data
-            targets = bindingdb_get_targets(info["smiles"], similarity_cutoff=0.9, affinity_cutoff=10.0)
-            # Keep top 5 affinities
-            info["affinity"] = sorted(targets, key=lambda x: x.get("affinity_value_uM", 999))[:5]
-            result["bindingdb_all_targets"].extend(info["affinity"])
+    # MoA, indications and warnings for all candidates in one batched query each
+    profiles = chembl_bulk_profiles(list(drug_map)) or {}
+    
+    # A candidate whose enrichment raises is skipped, not fatal to the others
+    failed = set()
 
-        info["moa"] = chembl_mechanisms(cid)
-        info["indications"] = chembl_drug_indications(cid)
-        info["warnings"] = chembl_drug_warnings(cid)
+    def enrich(item):
+        index, info = item
+        try:
+            return _enrich_candidate(info, index, len(drug_map), disease, profiles.get(info["chembl_id"]))
+        except Exception as e:
+            print(f"[Pipeline B] ⚠️ Skipping candidate {info.get('chembl_id')}: {e}")
+            failed.add(info.get("chembl_id"))
+            return None
 
-        # Literature support
-        lit_count = 0
-        if info.get("drug_name"):
-            lit_count = europe_pmc_count(f"{disease} AND {info['drug_name']}")
-            result["literature_support"][info["drug_name"]] = lit_count
-            
-        # --- SCORING LOGIC ---
-        # 1. Target Score: Sum of association scores of hit targets
-        target_score_sum = sum(t["score"] for t in info["targets_hit"])
-        
-        # 2. Affinity Bonus: +1 for <1uM, +2 for <0.1uM (max 2 points)
-        affinity_bonus = 0
-        if info["affinity"]:
-            best_aff = min(t.get("affinity_value_uM", 999) for t in info["affinity"])
-            if best_aff < 0.1: affinity_bonus = 2.0
-            elif best_aff < 1.0: affinity_bonus = 1.0
-            
-        # 3. Literature Bonus: log-like scale (0-3 points)
-        # >0: +0.5, >10: +1.0, >50: +2.0, >100: +3.0
-        lit_bonus = 0
-        if lit_count > 100: lit_bonus = 3.0
-        elif lit_count > 50: lit_bonus = 2.0
-        elif lit_count > 10: lit_bonus = 1.0
-        elif lit_count > 0: lit_bonus = 0.5
-        
-        # 4. Safety Penalty: -1 per warning type
-        safety_penalty = len(info["warnings"]) * 1.0
-        
-        # Final Score
-        final_score = (target_score_sum * 5) + affinity_bonus + lit_bonus - safety_penalty
-        info["repurposing_score"] = round(final_score, 2)
-        info["literature_count"] = lit_count
+    # Each candidate's enrichment only touches its own info dict; shared
+    # result fields are merged back here in candidate order
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for info in executor.map(enrich, enumerate(drug_map.values(), 1)):
+            if info is None:
+                continue
+            result["bindingdb_all_targets"].extend(info["affinity"])
+            if info.get("drug_name"):
+                result["literature_support"][info["drug_name"]] = info["literature_count"]
 
     # Sort candidates by score descending
-    sorted_candidates = sorted(drug_map.values(), key=lambda x: x.get("repurposing_score", 0), reverse=True)
+    candidates = [c for cid, c in drug_map.items() if cid not in failed]
+    sorted_candidates = sorted(candidates, key=lambda x: x.get("repurposing_score", 0), reverse=True)
     result["chembl_drug_candidates"] = sorted_candidates
     
     return result
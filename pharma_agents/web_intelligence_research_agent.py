@@ -1,5 +1,5 @@
 from agents import Agent, function_tool
-import requests
+import asyncio
 import json
 import os
 import dotenv
@@ -8,6 +8,8 @@ from pydantic import BaseModel, Field
 import xml.etree.ElementTree as ET
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from pharma_agents.tools.europe_pmc_tool import europe_pmc_search
+from pharma_agents.tools.json_utils import dumps
 
 dotenv.load_dotenv(override=True)
 
@@ -78,15 +80,21 @@ Do not recurse your own outputs as future inputs. Do not loop. Think crisply, in
 """
 
 @function_tool
-def europepmc_tool(query: str):
+async def europepmc_tool(query: str):
     """Search EuropePMC for scientific publications.
     
     Args:
         query: The search query string
     """
-    url=f"https://www.ebi.ac.uk/europepmc/webservices/rest/search?query={query}&resultType=lite&synonym=true&format=JSON&pageSize=100"
-    response = requests.get(url)
-    return response.text
+    return await asyncio.to_thread(europepmc_logic, query)
+
+
+def europepmc_logic(query: str) -> str:
+    """Core logic for the EuropePMC publication search."""
+    try:
+        return europe_pmc_search(query, page_size=100, synonym=True).text
+    except Exception as e:
+        return dumps({"error": f"EuropePMC search failed: {str(e)}"})
 
 # @function_tool
 # def web_intelligence_tool(query: str):
@@ -0,0 +1,55 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import agent_service
+
+
+@pytest.fixture(autouse=True)
+def empty_report_cache(monkeypatch):
+    monkeypatch.setattr(agent_service, "_report_cache", type(agent_service._report_cache)())
+
+
+def _run_with(monkeypatch, report, errors=()):
+    async def fake_pipeline(disease):
+        return SimpleNamespace(report=report, errors=list(errors), errors_text="\n\n".join(errors))
+
+    monkeypatch.setattr(agent_service, "run_pipeline", fake_pipeline)
+    return asyncio.run(agent_service.run_pharma_research("Drugs to treat asthma", user_id=1))
+
+
+def test_clean_report_is_cached(monkeypatch):
+    _, report = _run_with(monkeypatch, "# Asthma report")
+    assert report == "# Asthma report"
+    assert agent_service.get_cached_report("Asthma") == "# Asthma report"
+
+
+@pytest.mark.parametrize("report, errors", [
+    ("# Asthma report", ["patents: timed out"]),
+    ("⚠️ Agent timed out after 300 seconds.", []),
+    ("❌ Agent failed: rate limited", []),
+])
+def test_failed_runs_are_not_cached(monkeypatch, report, errors):
+    _, returned = _run_with(monkeypatch, report, errors)
+    assert returned == report
+    assert agent_service.get_cached_report("asthma") is None
+
+
+def test_cached_report_skips_the_pipeline(monkeypatch):
+    agent_service.cache_report("asthma", "cached report")
+
+    async def fail_pipeline(disease):
+        raise AssertionError("pipeline should not run")
+
+    monkeypatch.setattr(agent_service, "run_pipeline", fail_pipeline)
+    _, report = asyncio.run(agent_service.run_pharma_research("treat Asthma", user_id=1))
+    assert report == "cached report"
+
+
+def test_expired_report_is_evicted(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(agent_service.time, "monotonic", lambda: clock[0])
+    agent_service.cache_report("asthma", "old report")
+    clock[0] += agent_service.REPORT_CACHE_TTL + 1
+    assert agent_service.get_cached_report("asthma") is None
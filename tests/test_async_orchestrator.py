@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("agents")
+
+from pharma_agents import async_orchestrator as orchestrator
+from pharma_agents.async_orchestrator import prune_pipeline_data
+from pharma_agents.tools.json_utils import dumps
+
+
+@pytest.fixture(autouse=True)
+def char_tokens(monkeypatch):
+    # One token per character keeps budgets predictable without tiktoken
+    monkeypatch.setattr(orchestrator, "_count_tokens", len)
+
+
+def test_small_data_is_untouched():
+    data = {"query": "asthma", "disease_targets": [{"symbol": "IL5"}]}
+    assert prune_pipeline_data(data, max_tokens=1000) == data
+    assert prune_pipeline_data(None) is None
+    assert prune_pipeline_data({}) == {}
+
+
+def test_largest_branches_are_dropped_first():
+    data = {
+        "query": "asthma",
+        "chembl_drug_candidates": [{"name": "x" * 40}] * 5,
+        "bindingdb_all_targets": [{"t": "y" * 40}] * 2,
+        "disease_targets": [{"symbol": "IL5"}],
+    }
+    pruned = prune_pipeline_data(data, max_tokens=len(dumps(data)) - 50)
+
+    assert pruned["chembl_drug_candidates"] == "(omitted: 5 entries exceeded the prompt budget)"
+    assert pruned["bindingdb_all_targets"] == data["bindingdb_all_targets"]
+    assert pruned["query"] == "asthma"
+    # the caller's data is not modified
+    assert isinstance(data["chembl_drug_candidates"], list)
+
+
+def test_pruning_stops_when_only_scalars_remain():
+    data = {"query": "asthma " * 50, "targets": [1, 2, 3]}
+    pruned = prune_pipeline_data(data, max_tokens=10)
+    assert pruned == {"query": data["query"], "targets": "(omitted: 3 entries exceeded the prompt budget)"}
@@ -0,0 +1,124 @@
+import threading
+import time
+
+from pharma_agents.tools import cache
+from pharma_agents.tools.cache import ttl_cache
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+    calls = []
+
+    @ttl_cache(maxsize=8, ttl=10)
+    def fetch(x):
+        calls.append(x)
+        return x * 2
+
+    assert fetch(2) == 4
+    clock[0] += 5
+    assert fetch(2) == 4
+    assert calls == [2]
+
+    clock[0] += 6
+    assert fetch(2) == 4
+    assert calls == [2, 2]
+
+
+def test_cache_if_rejects_results():
+    calls = []
+
+    @ttl_cache(cache_if=lambda r: r != "error")
+    def fetch(x):
+        calls.append(x)
+        return "error" if x < 0 else "ok"
+
+    fetch(-1)
+    fetch(-1)
+    fetch(1)
+    fetch(1)
+    assert calls == [-1, -1, 1]
+    assert fetch.cache_info()["size"] == 1
+
+
+def test_lru_eviction():
+    calls = []
+
+    @ttl_cache(maxsize=2)
+    def fetch(x):
+        calls.append(x)
+        return x
+
+    for x in (1, 2, 1, 3, 1, 2):
+        fetch(x)
+    # 1 was refreshed before 3 arrived, so 2 was the least recently used
+    assert calls == [1, 2, 3, 2]
+
+    fetch.cache_clear()
+    assert fetch.cache_info() == {"hits": 0, "misses": 0, "coalesced": 0, "size": 0}
+
+
+def test_single_flight_coalesces_concurrent_misses():
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+
+    @ttl_cache()
+    def fetch(x):
+        calls.append(x)
+        entered.set()
+        release.wait(5)
+        return object()
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(fetch(1)))
+    leader.start()
+    assert entered.wait(5)
+    follower = threading.Thread(target=lambda: results.append(fetch(1)))
+    follower.start()
+    deadline = time.monotonic() + 5
+    while fetch.cache_info()["coalesced"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert calls == [1]
+    assert len(results) == 2 and results[0] is results[1]
+
+
+def test_single_flight_waiter_retries_after_leader_raises():
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+
+    @ttl_cache()
+    def fetch(x):
+        calls.append(x)
+        if len(calls) == 1:
+            entered.set()
+            release.wait(5)
+            raise RuntimeError("upstream failed")
+        return "ok"
+
+    errors, results = [], []
+
+    def leader_call():
+        try:
+            fetch(1)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=leader_call)
+    leader.start()
+    assert entered.wait(5)
+    follower = threading.Thread(target=lambda: results.append(fetch(1)))
+    follower.start()
+    deadline = time.monotonic() + 5
+    while fetch.cache_info()["coalesced"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 1
+    assert results == ["ok"]
+    assert calls == [1, 1]
@@ -0,0 +1,84 @@
+import pytest
+
+pytest.importorskip("agents")
+
+from pharma_agents import clinical_trails_research_agent as ct
+from pharma_agents.clinical_trails_research_agent import ClinicalTrialsToolInput
+from pharma_agents.tools.json_utils import loads
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({}, "Provide at least one of"),
+    ({"condition": ["  ", ""]}, "Provide at least one of"),
+    ({"condition": "asthma", "status": ["recruiting", "open"]}, "Invalid status value(s) ['open']"),
+    ({"condition": "asthma", "study_type": "survey"}, "Invalid study_type 'survey'"),
+    ({"condition": "asthma", "page_size": 0}, "page_size must be at least 1"),
+    ({"condition": "asthma", "max_pages": 0}, "max_pages must be at least 1"),
+])
+def test_invalid_input_is_rejected(kwargs, message):
+    assert message in ct._validate_trials_input(ClinicalTrialsToolInput(**kwargs))
+
+
+def test_valid_input_normalizes_enums():
+    trials_input = ClinicalTrialsToolInput(
+        intervention="metformin", status=["Not yet recruiting"], study_type="interventional"
+    )
+    assert ct._validate_trials_input(trials_input) is None
+    params = ct._build_params(trials_input)
+    assert params["filter.overallStatus"] == "NOT_YET_RECRUITING"
+    assert params["filter.studyType"] == "INTERVENTIONAL"
+
+
+def test_condition_queries():
+    assert ct._condition_queries(None) == [None]
+    assert ct._condition_queries(" asthma ") == ["asthma"]
+    assert ct._condition_queries(["asthma", "", "copd"]) == ['("asthma" OR "copd")']
+
+
+def test_long_condition_lists_are_chunked(monkeypatch):
+    monkeypatch.setattr(ct, "MAX_CONDITION_QUERY_CHARS", 30)
+    queries = ct._condition_queries(["asthma", "copd", "bronchitis", "emphysema"])
+    assert queries == ['("asthma" OR "copd")', '("bronchitis" OR "emphysema")']
+    # every term lands in exactly one chunk
+    assert sum(q.count('"') // 2 for q in queries) == 4
+
+
+def _study(nct_id, conditions):
+    return {"nctId": nct_id, "conditions": conditions}
+
+
+def test_multi_condition_search_merges_chunks(monkeypatch):
+    monkeypatch.setattr(ct, "MAX_CONDITION_QUERY_CHARS", 15)
+    pages = {
+        '("asthma")': [_study("NCT1", ["Asthma"]), _study("NCT2", ["Asthma", "COPD"])],
+        '("copd")': [_study("NCT2", ["Asthma", "COPD"]), _study("NCT3", ["COPD"])],
+    }
+    requested = []
+
+    def fake_fetch(params):
+        cond = dict(params)["query.cond"]
+        requested.append(cond)
+        return {"studies": pages[cond], "nextPageToken": "next"}
+
+    monkeypatch.setattr(ct, "_fetch", fake_fetch)
+
+    out = loads(ct.clinical_trials_research_logic(ClinicalTrialsToolInput(condition=["asthma", "copd"])))
+
+    assert sorted(requested) == ['("asthma")', '("copd")']
+    assert [s["nctId"] for s in out["studies"]] == ["NCT1", "NCT2", "NCT3"]
+    assert [s["matchedConditions"] for s in out["studies"]] == [["asthma"], ["asthma", "copd"], ["copd"]]
+    # continuation tokens are dropped when the search spans several chunks
+    assert out["nextPageToken"] is None
+
+
+def test_prefetch_is_opt_in(monkeypatch):
+    monkeypatch.setattr(ct, "_fetch", lambda params: {"studies": [], "nextPageToken": "tok"})
+    prefetched = []
+    monkeypatch.setattr(ct.IO_POOL, "submit", lambda fn, params: prefetched.append(dict(params)["pageToken"]))
+    trials_input = ClinicalTrialsToolInput(condition="asthma")
+
+    assert loads(ct.clinical_trials_research_logic(trials_input))["nextPageToken"] == "tok"
+    assert prefetched == []
+
+    ct.clinical_trials_research_logic(trials_input, prefetch=True)
+    assert prefetched == ["tok"]
@@ -0,0 +1,28 @@
+import pytest
+
+from pharma_agents.tools.hs_codes import hs_category_lookup
+
+
+@pytest.mark.parametrize("hs_code, prefix", [
+    ("300431", "300431"),   # exact 6-digit heading
+    ("3004.31", "300431"),  # dotted notation
+    ("300499", "3004"),     # unknown subheading falls back to the 4-digit heading
+    ("29371290", "293712"), # national 8-digit code is cut to HS6
+    ("2905", "29"),         # only the chapter is known
+])
+def test_longest_prefix_wins(hs_code, prefix):
+    result = hs_category_lookup(hs_code)
+    assert result["matched_prefix"] == prefix
+
+
+def test_lookup_reports_normalized_code():
+    assert hs_category_lookup("3004.90") == {
+        "hs_code": "300490",
+        "matched_prefix": "300490",
+        "category": "Other medicaments in measured doses (finished formulation)",
+    }
+
+
+@pytest.mark.parametrize("hs_code", ["8471", "3", "", None, "abc"])
+def test_non_pharma_codes_return_none(hs_code):
+    assert hs_category_lookup(hs_code) is None
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from pharma_agents.tools import tool_budget
+from pharma_agents.tools.tool_budget import BUDGET_EXHAUSTED, budgeted, start_tool_budget, take_budget
+
+
+@pytest.fixture(autouse=True)
+def no_budget():
+    token = tool_budget._budget.set(None)
+    yield
+    tool_budget._budget.reset(token)
+
+
+@budgeted
+def sync_tool(x):
+    return f"sync {x}"
+
+
+@budgeted
+async def async_tool(x):
+    return f"async {x}"
+
+
+def test_unlimited_without_a_budget():
+    assert [sync_tool(i) for i in range(3)] == ["sync 0", "sync 1", "sync 2"]
+    assert take_budget(5) == 5
+
+
+def test_sync_tool_exhausts_budget():
+    start_tool_budget(2)
+    assert sync_tool(1) == "sync 1"
+    assert sync_tool(2) == "sync 2"
+    assert sync_tool(3) == BUDGET_EXHAUSTED
+
+
+def test_async_tool_shares_the_budget_with_sync_tools():
+    async def run():
+        start_tool_budget(2)
+        return [sync_tool(1), await async_tool(2), await async_tool(3)]
+
+    assert asyncio.run(run()) == ["sync 1", "async 2", BUDGET_EXHAUSTED]
+
+
+def test_async_wrapper_stays_a_coroutine_function():
+    assert asyncio.iscoroutinefunction(async_tool)
+    assert not asyncio.iscoroutinefunction(sync_tool)
+
+
+def test_take_budget_grants_what_is_left():
+    start_tool_budget(3)
+    assert take_budget(2) == 2
+    assert take_budget(2) == 1
+    assert take_budget(1) == 0
+
+
+def test_concurrent_runs_have_separate_budgets():
+    async def agent_run(limit):
+        start_tool_budget(limit)
+        await asyncio.sleep(0)
+        return [await async_tool(i) for i in range(3)].count(BUDGET_EXHAUSTED)
+
+    async def run():
+        return await asyncio.gather(agent_run(1), agent_run(3))
+
+    assert asyncio.run(run()) == [2, 0]
@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip("agents")
+pytest.importorskip("requests")
+
+from pharma_agents.tools import unified_repurposing_pipeline as pipeline
+
+
+def _candidate(cid="CHEMBL1"):
+    return {
+        "chembl_id": cid,
+        "drug_name": None,
+        "smiles": None,
+        "affinity": [],
+        "moa": [],
+        "indications": [],
+        "warnings": [],
+        "targets_hit": [{"symbol": "PPARG", "score": 0.5}],
+        "repurposing_score": 0.0,
+    }
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Replace the network lookups _enrich_candidate makes; record literature queries."""
+    lit_queries = []
+    monkeypatch.setattr(pipeline, "chembl_get_molecule", lambda cid: {"chembl_id": cid, "name": "PIOGLITAZONE", "smiles": "CCO"})
+    monkeypatch.setattr(pipeline, "bindingdb_get_targets", lambda smiles, **kw: [
+        {"target": "A", "affinity_value_uM": 3.0},
+        {"target": "B", "affinity_value_uM": 0.05},
+    ])
+
+    def fake_count(query):
+        lit_queries.append(query)
+        return 120
+
+    monkeypatch.setattr(pipeline, "europe_pmc_count", fake_count)
+    return lit_queries
+
+
+def test_enrich_candidate_scores_with_profile(offline):
+    profile = {"moa": ["agonist"], "indications": ["diabetes"], "warnings": [{"warning_type": "Boxed"}]}
+
+    info = pipeline._enrich_candidate(_candidate(), 1, 1, "Type 2 Diabetes", profile)
+
+    assert info["drug_name"] == "PIOGLITAZONE"
+    assert info["moa"] == ["agonist"]
+    assert [t["target"] for t in info["affinity"]] == ["B", "A"]
+    assert offline == ["Type 2 Diabetes AND PIOGLITAZONE"]
+    assert info["literature_count"] == 120
+    # 0.5 * 5 target score + 2 affinity bonus + 3 literature bonus - 1 warning
+    assert info["repurposing_score"] == 6.5
+
+
+def test_enrich_candidate_unresolved_molecule(offline, monkeypatch):
+    monkeypatch.setattr(pipeline, "chembl_get_molecule", lambda cid: None)
+
+    assert pipeline._enrich_candidate(_candidate(), 1, 1, "Type 2 Diabetes") is None
+    assert offline == []
+
+
+def test_disease_pipeline_skips_failing_candidate(offline, monkeypatch):
+    from pharma_agents.tools import open_targets_tool
+
+    monkeypatch.setattr(open_targets_tool, "open_targets_disease_lookup", lambda disease, limit=10: [
+        {"target_id": "T1", "symbol": "PPARG", "association_score": 0.5},
+    ])
+    monkeypatch.setattr(pipeline, "chembl_drugs_for_target", lambda tid: [{"chembl_id": "CHEMBL1"}, {"chembl_id": "CHEMBL2"}])
+    monkeypatch.setattr(pipeline, "chembl_bulk_profiles", lambda ids: {
+        cid: {"moa": [], "indications": [], "warnings": []} for cid in ids
+    })
+
+    def get_molecule(cid):
+        if cid == "CHEMBL2":
+            raise ValueError("malformed ChEMBL record")
+        return {"chembl_id": cid, "name": "PIOGLITAZONE", "smiles": "CCO"}
+
+    monkeypatch.setattr(pipeline, "chembl_get_molecule", get_molecule)
+
+    result = pipeline.execute_disease_pipeline("Type 2 Diabetes")
+
+    assert [c["chembl_id"] for c in result["chembl_drug_candidates"]] == ["CHEMBL1"]
+    assert result["literature_support"] == {"PIOGLITAZONE": 120}